@@ -1,5 +1,48 @@
 
-from .segmenters import (
-    sentenize,
-    tokenize
-)
+__all__ = ['sentenize', 'tokenize']
+
+WARMUP_TEXTS = [
+    'Т.е. что-то, don\'t. См. http://example.com/a?b=1, doi:10.1000/1 и т.д.',
+    '«Да», — сказал он. 1) пункт; А. С. Пушкин. Ok!',
+]
+
+
+def warmup(freeze=False):
+    # Builds every lazy structure now: segmenters, scanner regexes,
+    # dictionaries snapshot, en tables. Call in parent before fork, children
+    # then share these pages instead of each building own copy. With freeze
+    # gc.freeze() moves them out of collector, its passes do not touch and
+    # so do not copy them
+    import gc
+
+    from .segmenters import load
+    from .segmenters.en_support import (
+        _get_special_en_tokens,
+        _get_specian_en_prefixes
+    )
+
+    tokenize = load('tokenize')
+    sentenize = load('sentenize')
+    tokenize.dictionaries.snapshot
+    tokenize.split.re
+    sentenize.split.re
+    _get_special_en_tokens()
+    _get_specian_en_prefixes()
+    for text in WARMUP_TEXTS:
+        list(tokenize(text))
+        list(sentenize(text))
+
+    gc.collect()
+    if freeze:
+        gc.freeze()
+
+
+def __getattr__(name):
+    # segmenters load on first access, see razdel.segmenters
+    if name in __all__:
+        from .segmenters import load
+
+        segment = load(name)
+        globals()[name] = segment
+        return segment
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
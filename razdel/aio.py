@@ -0,0 +1,55 @@
+
+import asyncio
+
+from razdel import (
+    tokenize,
+    sentenize
+)
+
+
+SLICE_SIZE = 1000
+CONCURRENCY = 4
+
+
+async def asegment(segment, text, executor=None):
+    # executor=None is the loop default thread pool
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, segment.segment_list, text)
+
+
+async def atokenize(text, executor=None):
+    return await asegment(tokenize, text, executor)
+
+
+async def asentenize(text, executor=None):
+    return await asegment(sentenize, text, executor)
+
+
+async def asegment_iter(segment, text, slice_size=SLICE_SIZE):
+    # runs in the loop thread, segmenters stream, so every slice_size
+    # substrings cost a bounded amount of work before control goes back to
+    # the loop
+    for index, substring in enumerate(segment(text), 1):
+        yield substring
+        if index % slice_size == 0:
+            await asyncio.sleep(0)
+
+
+def atokenize_iter(text, slice_size=SLICE_SIZE):
+    return asegment_iter(tokenize, text, slice_size)
+
+
+def asentenize_iter(text, slice_size=SLICE_SIZE):
+    return asegment_iter(sentenize, text, slice_size)
+
+
+async def abatch(segment, texts, concurrency=CONCURRENCY, executor=None):
+    # at most concurrency texts are in the executor at once, results keep
+    # order of texts
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(text):
+        async with semaphore:
+            return await asegment(segment, text, executor)
+
+    return await asyncio.gather(*[run(_) for _ in texts])
@@ -0,0 +1,78 @@
+
+from array import array
+
+from razdel.spans import SPAN_TYPE
+from razdel.substring import unit_spans
+
+
+# Optional, requires pyarrow: pip install razdel[arrow]. Spans of every
+# document are appended to flat int32 buffers, Arrow arrays wrap them
+# without copy. Offsets come from spans method of segmenter, no Token or
+# Substring objects, python objects are input strings and span tuples
+
+
+def spans_type():
+    import pyarrow as pa
+
+    return pa.list_(pa.struct([
+        ('start', pa.int32()),
+        ('stop', pa.int32()),
+        ('type', pa.int32()),
+    ]))
+
+
+def int32_array(values):
+    import pyarrow as pa
+
+    return pa.Array.from_buffers(
+        pa.int32(), len(values),
+        [None, pa.py_buffer(values)]
+    )
+
+
+def segment_array(segment, strings, unit=None):
+    # strings is string Array or ChunkedArray, result is
+    # list<struct<start, stop, type>> of same length and chunks, type is -1
+    # for sentences, null string gives null list. unit is "utf-8" or
+    # "utf-16" for offsets in encoded text
+    import pyarrow as pa
+
+    if isinstance(strings, pa.ChunkedArray):
+        return pa.chunked_array(
+            [segment_array(segment, _, unit) for _ in strings.chunks],
+            type=spans_type()
+        )
+
+    offsets = array(SPAN_TYPE, [0])
+    starts = array(SPAN_TYPE)
+    stops = array(SPAN_TYPE)
+    types = array(SPAN_TYPE)
+    nulls = []
+    for text in strings.to_pylist():
+        nulls.append(text is None)
+        if text is not None:
+            spans = unit_spans(segment.spans(text), text, unit)
+            for start, stop, type in spans:
+                starts.append(start)
+                stops.append(stop)
+                types.append(type)
+        offsets.append(len(starts))
+
+    values = pa.StructArray.from_arrays(
+        [int32_array(starts), int32_array(stops), int32_array(types)],
+        names=['start', 'stop', 'type']
+    )
+    mask = pa.array(nulls, pa.bool_()) if any(nulls) else None
+    return pa.ListArray.from_arrays(int32_array(offsets), values, mask=mask)
+
+
+def tokenize_array(strings, unit=None):
+    from razdel import tokenize
+
+    return segment_array(tokenize, strings, unit)
+
+
+def sentenize_array(strings, unit=None):
+    from razdel import sentenize
+
+    return segment_array(sentenize, strings, unit)
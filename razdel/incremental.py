@@ -0,0 +1,288 @@
+
+from bisect import bisect_left
+
+from razdel.record import Record
+from razdel.substring import Substring
+from razdel.segmenters.tokenize import Token
+
+
+# Editor keeps one document, after edit only region around it is scanned
+# again. Boundaries of that region are "hard starts": start of text or first
+# char after whitespace. No atom crosses whitespace, except DOI "doi: 10.1",
+# so gap after ":" does not count. Scan from hard start gives same atoms as
+# scan of whole text, and split on whitespace is never decided by rules.
+# Rules see 3 atoms on each side of split, atoms that are 2 words away from
+# the edit do not change their decisions
+
+
+def is_hard_start(text, index):
+    if index == 0:
+        return True
+    if index >= len(text) or text[index].isspace() or not text[index - 1].isspace():
+        return False
+    gap = index - 1
+    while gap > 0 and text[gap - 1].isspace():
+        gap -= 1
+    return gap == 0 or text[gap - 1] != ':'
+
+
+def hard_starts_before(text, pos, count):
+    # up to count hard starts <= pos, closest first
+    starts = []
+    index = min(pos, len(text))
+    while index > 0 and len(starts) < count:
+        if is_hard_start(text, index):
+            starts.append(index)
+        index -= 1
+    if index == 0 and len(starts) < count:
+        starts.append(0)
+    return starts
+
+
+def hard_starts_after(text, old, pos, delta, count):
+    # up to count hard starts >= pos in text, that are hard in old text too,
+    # text[pos:] is old[pos - delta:]
+    starts = []
+    index = pos
+    size = len(text)
+    while index < size and len(starts) < count:
+        if is_hard_start(text, index) and is_hard_start(old, index - delta):
+            starts.append(index)
+        index += 1
+    return starts
+
+
+class Change(Record):
+    # tokens [start, stop) replaced [start, old_stop) of previous version
+    __attributes__ = ['start', 'old_stop', 'stop']
+
+    def __init__(self, start, old_stop, stop):
+        self.start = start
+        self.old_stop = old_stop
+        self.stop = stop
+
+
+class Incremental:
+    # Offsets are kept in gap buffer: before gap they are absolute, after
+    # gap relative to the end of text. Text after the edit moves, relative
+    # offsets stay the same, edit touches only spans between the gap and
+    # the edit, editor edits are close to each other
+
+    def __init__(self, text, segment):
+        self.segment = segment
+        self.text = text
+        self.starts = []
+        self.stops = []
+        self.gap = 0
+
+    def __len__(self):
+        return len(self.starts)
+
+    def offsets(self, index):
+        start, stop = self.starts[index], self.stops[index]
+        if index >= self.gap:
+            size = len(self.text)
+            start += size
+            stop += size
+        return start, stop
+
+    def check(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return index
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def bisect(self, items, offset):
+        index = bisect_left(items, offset, 0, self.gap)
+        if index < self.gap:
+            return index
+        return bisect_left(items, offset - len(self.text), self.gap, len(self))
+
+    def find(self, offset):
+        # index of first span with start >= offset
+        return self.bisect(self.starts, offset)
+
+    def move_gap(self, index):
+        size = len(self.text)
+        starts, stops = self.starts, self.stops
+        if index < self.gap:
+            for item in range(index, self.gap):
+                starts[item] -= size
+                stops[item] -= size
+        else:
+            for item in range(self.gap, index):
+                starts[item] += size
+                stops[item] += size
+        self.gap = index
+
+    def splice(self, first, old_stop, spans, text):
+        self.move_gap(old_stop)
+        self.starts[first:old_stop] = [_[0] for _ in spans]
+        self.stops[first:old_stop] = [_[1] for _ in spans]
+        self.gap = first + len(spans)
+        self.text = text
+        return Change(first, old_stop, self.gap)
+
+    def check_edit(self, start, stop):
+        if not 0 <= start <= stop <= len(self.text):
+            raise ValueError('bad edit range %d:%d' % (start, stop))
+
+
+class IncrementalTokenizer(Incremental):
+    def __init__(self, text='', segment=None):
+        if segment is None:
+            from razdel import tokenize as segment
+
+        super(IncrementalTokenizer, self).__init__(text, segment)
+        self.types = []
+        for token in segment.scan(text):
+            self.starts.append(token.start)
+            self.stops.append(token.stop)
+            self.types.append(token.token_type)
+        self.gap = len(self.starts)
+
+    def __getitem__(self, index):
+        index = self.check(index)
+        start, stop = self.offsets(index)
+        return Token(start, stop, self.text[start:stop], self.types[index])
+
+    @property
+    def tokens(self):
+        return list(self)
+
+    def rescan(self, text, scan, anchor, resync, endpos):
+        tokens = []
+        for token in self.segment.scan(text, scan, endpos):
+            if token.start < anchor:
+                continue
+            if resync is not None and token.start >= resync:
+                break
+            tokens.append((token.start, token.stop, token.token_type))
+        return tokens
+
+    def edit(self, start, stop, text):
+        self.check_edit(start, stop)
+        old = self.text
+
+        new = old[:start] + text + old[stop:]
+        delta = len(text) - (stop - start)
+        end = start + len(text)
+
+        # 2 whole words between anchor and edit, 2 more before anchor for
+        # left context of rules
+        before = hard_starts_before(old, start, 5)
+        anchor = before[2] if len(before) > 2 else 0
+        scan = before[4] if len(before) > 4 else 0
+        # same on the right, resync after 2 unchanged words, scan stops 3
+        # words later, splits before resync see 3 atoms right
+        after = hard_starts_after(new, old, end, delta, 6)
+        resync = after[2] if len(after) > 2 else None
+        endpos = after[5] if len(after) > 5 else None
+
+        first = self.find(anchor)
+        old_stop = len(self) if resync is None else self.find(resync - delta)
+        tokens = self.rescan(new, scan, anchor, resync, endpos)
+
+        # report only tokens that really changed
+        head = 0
+        while (head < len(tokens) and first + head < old_stop
+               and tokens[head][1] <= start
+               and tokens[head] == self.offsets(first + head) + (self.types[first + head],)):
+            head += 1
+        tail = 0
+        while (tail < len(tokens) - head and old_stop - tail > first + head):
+            index = old_stop - tail - 1
+            old_start, old_end = self.offsets(index)
+            new_start, new_end, type = tokens[-tail - 1]
+            if not (old_start >= stop and new_start == old_start + delta
+                    and new_end == old_end + delta and type == self.types[index]):
+                break
+            tail += 1
+        tokens = tokens[head:len(tokens) - tail]
+        first += head
+        old_stop -= tail
+
+        self.types[first:old_stop] = [_[2] for _ in tokens]
+        return self.splice(first, old_stop, tokens, new)
+
+
+# Sentence splits are decided on delimiter, 10 chars window on each side and
+# buffer, text from previous split to delimiter. Delimiter regex looks at
+# most 5 chars ahead. Scan restarts at split that is window chars before the
+# edit: splits before it do not see the edit, buffer of the next one starts
+# at it as in the whole text. Scan stops on new split that is window chars
+# after the edit and was split before the edit: from there text, regex
+# matches and buffers are the same
+
+
+class IncrementalSentenizer(Incremental):
+    def __init__(self, text='', segment=None):
+        if segment is None:
+            from razdel import sentenize as segment
+
+        super(IncrementalSentenizer, self).__init__(text, segment)
+        for sent in segment.scan(text):
+            self.starts.append(sent.start)
+            self.stops.append(sent.stop)
+        self.gap = len(self.starts)
+
+    def __getitem__(self, index):
+        index = self.check(index)
+        start, stop = self.offsets(index)
+        return Substring(start, stop, self.text[start:stop])
+
+    @property
+    def sents(self):
+        return list(self)
+
+    def find_stop(self, offset):
+        # index of first sentence with stop >= offset
+        return self.bisect(self.stops, offset)
+
+    def is_split(self, offset):
+        # every sentence but the last ends with delimiter, on split
+        index = self.find_stop(offset)
+        return index < len(self) - 1 and self.offsets(index)[1] == offset
+
+    def edit(self, start, stop, text):
+        self.check_edit(start, stop)
+        old = self.text
+        new = old[:start] + text + old[stop:]
+        delta = len(text) - (stop - start)
+        end = start + len(text)
+        window = self.segment.split.window
+
+        # last sentence is always scanned, it does not end on split
+        first = min(self.find_stop(start - window + 1), len(self) - 1)
+        first = max(first, 0)
+        pos = self.offsets(first - 1)[1] if first else 0
+
+        sents = []
+        old_stop = len(self)
+        for sent in self.segment.scan(new, pos):
+            sents.append((sent.start, sent.stop))
+            split = sent.stop
+            if split >= end + window and self.is_split(split - delta):
+                old_stop = self.find_stop(split - delta) + 1
+                break
+
+        head = 0
+        while (head < len(sents) and first + head < old_stop
+               and sents[head][1] <= start
+               and sents[head] == self.offsets(first + head)):
+            head += 1
+        tail = 0
+        while (tail < len(sents) - head and old_stop - tail > first + head):
+            old_start, old_end = self.offsets(old_stop - tail - 1)
+            new_start, new_end = sents[-tail - 1]
+            if not (old_start >= stop and new_start == old_start + delta
+                    and new_end == old_end + delta):
+                break
+            tail += 1
+        sents = sents[head:len(sents) - tail]
+        return self.splice(first + head, old_stop - tail, sents, new)
@@ -0,0 +1,353 @@
+
+import os
+import re
+from functools import partial
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    ProcessPoolExecutor
+)
+
+import razdel
+from razdel import (
+    tokenize,
+    sentenize
+)
+from razdel.spans import (
+    pack_spans,
+    unpack_spans
+)
+from razdel.substring import Substring
+from razdel.incremental import (
+    is_hard_start,
+    hard_starts_before,
+    hard_starts_after
+)
+from razdel.segmenters.sentenize import (
+    ENDINGS,
+    DELIMITERS,
+    BULLET_SIZE,
+    SentSplit
+)
+
+
+def tokenize_spans(text):
+    return pack_spans(tokenize(text))
+
+
+def sentenize_spans(text):
+    return pack_spans(sentenize(text))
+
+
+SPANS = {
+    'tokenize': tokenize_spans,
+    'sentenize': sentenize_spans,
+}
+
+
+def segment_spans_batch(segment, texts):
+    function = SPANS[segment]
+    return [function(_) for _ in texts]
+
+
+def parent_snapshot():
+    # Words and abbrevs set with init_words_dictionary/init_abbrevs_dictionary
+    # in parent. Workers started with spawn or forkserver and
+    # sub-interpreters import razdel anew and get default ones
+    from razdel.segmenters.common_tokenize import DICTIONARIES
+
+    return DICTIONARIES.snapshot
+
+
+def default_dictionaries(snapshot):
+    # as in fresh interpreter
+    from razdel.snapshot import uncached
+    from razdel.segmenters.dictionaries import (
+        BaseWordDictionary,
+        DefAbbrsWordDictionary
+    )
+
+    return (
+        type(uncached(snapshot.words_dict)) is BaseWordDictionary
+        and type(uncached(snapshot.abbrevs_dict)) is DefAbbrsWordDictionary
+    )
+
+
+def warmup(words_dict=None, abbrevs_dict=None):
+    # runs once per worker, installs parent dictionaries, first request
+    # should not pay for lazy init
+    from razdel.segmenters.common_tokenize import (
+        init_words_dictionary,
+        init_abbrevs_dictionary
+    )
+
+    if words_dict is not None:
+        init_words_dictionary(words_dict)
+    if abbrevs_dict is not None:
+        init_abbrevs_dictionary(abbrevs_dict)
+    razdel.warmup()
+
+
+def thread_executor(workers=None):
+    return ThreadPoolExecutor(workers)
+
+
+def worker_pool(Executor, workers, **kwargs):
+    # Workers get parent dictionaries, cache is dropped, see razdel.snapshot.
+    # Shards check dictionaries_version, pool made before
+    # init_words_dictionary has old ones
+    from razdel.snapshot import uncached
+
+    snapshot = parent_snapshot()
+    executor = Executor(
+        workers,
+        initializer=warmup,
+        initargs=(
+            uncached(snapshot.words_dict),
+            uncached(snapshot.abbrevs_dict)
+        ),
+        **kwargs
+    )
+    executor.dictionaries_version = snapshot.version
+    return executor
+
+
+def process_executor(workers=None, context=None):
+    # context is multiprocessing context, default start method if None
+    return worker_pool(ProcessPoolExecutor, workers, mp_context=context)
+
+
+def interpreter_executor(workers=None):
+    # Every sub-interpreter has own GIL and imports razdel once. Public api
+    # for that is concurrent.futures.InterpreterPoolExecutor, CPython 3.14+
+    try:
+        from concurrent.futures import InterpreterPoolExecutor
+    except ImportError:
+        raise RuntimeError('sub-interpreter pool requires CPython 3.14+')
+    return worker_pool(InterpreterPoolExecutor, workers)
+
+
+EXECUTORS = {
+    'threads': thread_executor,
+    'processes': process_executor,
+    'interpreters': interpreter_executor,
+}
+
+
+def map_spans(segment, texts, executor, chunksize=1):
+    # segment is "tokenize" or "sentenize", yields span buffers in order of
+    # texts, decode with razdel.spans.unpack_spans
+    return executor.map(SPANS[segment], texts, chunksize=chunksize)
+
+
+#########
+#
+#   SHARDS
+#
+#######
+
+
+# Huge document is cut in shards on hard starts, see razdel.incremental.
+# Shard is scanned with 2 words of context before and 3 words after, tokens
+# of context are dropped, so merged tokens are the same as of serial scan.
+# Shards go to processes, under GIL threads do not scan in parallel
+
+SHARD_SIZE = 1 << 16
+SHARDS_PER_WORKER = 4
+SPACE_END = re.compile(r'\s\S', re.U)
+
+
+def next_hard_start(text, pos):
+    # first hard start >= pos, None if there is none
+    while True:
+        match = SPACE_END.search(text, pos)
+        if not match:
+            return
+        index = match.end() - 1
+        if is_hard_start(text, index):
+            return index
+        pos = index
+
+
+def cut_points(text, count, next_cut=next_hard_start):
+    # cuts text in about count parts, with 0 and len(text)
+    size = len(text)
+    cuts = [0]
+    for index in range(1, count):
+        target = size * index // count
+        if target <= cuts[-1]:
+            continue
+        cut = next_cut(text, target)
+        if cut is None:
+            break
+        cuts.append(cut)
+    if cuts[-1] < size:
+        cuts.append(size)
+    return cuts
+
+
+def token_shards(text, cuts):
+    # shard text with context, shard bounds in it and its offset in text
+    for start, stop in zip(cuts, cuts[1:]):
+        before = hard_starts_before(text, start, 3)
+        pos = before[2] if len(before) > 2 else 0
+        after = hard_starts_after(text, text, stop, 0, 4)
+        endpos = after[3] if len(after) > 3 else len(text)
+        yield text[pos:endpos], start - pos, stop - pos, pos
+
+
+def scan_shard(segment, text, start, stop):
+    tokens = []
+    for token in segment.scan(text):
+        if token.start >= stop:
+            break
+        if token.start >= start:
+            tokens.append(token)
+    return pack_spans(tokens)
+
+
+def tokenize_shard(text, start, stop):
+    return scan_shard(tokenize, text, start, stop)
+
+
+def shard_function(segment, executor, default, scan, function):
+    # segmenter with own dictionaries holds a lock and does not pickle,
+    # processes run function with default segmenter. Exact type,
+    # InterpreterPoolExecutor subclasses ThreadPoolExecutor but does not
+    # share objects
+    if type(executor) is ThreadPoolExecutor:
+        return partial(scan, segment)
+    if segment is not default:
+        raise ValueError('custom segmenter shards run only in threads')
+    return function
+
+
+def check_dictionaries(executor):
+    # Own pool of map_shards is made with current dictionaries. Pool of
+    # process_executor has those of its version, other pools have defaults.
+    # Sentenize does not use dictionaries
+    if executor is None or type(executor) is ThreadPoolExecutor:
+        return
+    snapshot = parent_snapshot()
+    version = getattr(executor, 'dictionaries_version', None)
+    if version is None:
+        same = default_dictionaries(snapshot)
+    else:
+        same = version == snapshot.version
+    if not same:
+        raise ValueError(
+            'executor workers do not have current dictionaries, make it '
+            'with razdel.pool.process_executor after init_words_dictionary'
+        )
+
+
+def shard_count(text, workers):
+    return min(
+        (workers or os.cpu_count() or 1) * SHARDS_PER_WORKER,
+        len(text) // SHARD_SIZE
+    )
+
+
+def map_shards(function, shards, workers, executor):
+    # own pool gets parent dictionaries, see process_executor. Pool passed
+    # in is checked by shard_function
+    texts, starts, stops, offsets = zip(*shards)
+    if executor is not None:
+        return offsets, list(executor.map(function, texts, starts, stops))
+    with process_executor(workers) as executor:
+        return offsets, list(executor.map(function, texts, starts, stops))
+
+
+def parallel_tokenize(segment, text, workers=None, executor=None):
+    from razdel.segmenters.tokenize import Token, TokenType
+
+    count = shard_count(text, workers)
+    cuts = cut_points(text, count)
+    if len(cuts) < 3:
+        yield from segment.scan(text)
+        return
+
+    function = shard_function(
+        segment, executor,
+        tokenize, scan_shard, tokenize_shard
+    )
+    check_dictionaries(executor)
+    offsets, buffers = map_shards(
+        function, token_shards(text, cuts),
+        workers, executor
+    )
+    for offset, buffer in zip(offsets, buffers):
+        for start, stop, type in unpack_spans(buffer):
+            start += offset
+            stop += offset
+            yield Token(start, stop, text[start:stop], TokenType(type))
+
+
+# Sentences are cut after ending before line break that is split in the
+# whole text whatever segmentation before it. Regex match of "." is the same
+# from any start, smiles do not contain endings. Without delimiters in
+# BULLET_SIZE + 1 chars before ending, buffer is too long for list_item,
+# other rules look only at window, evaluate them. Shard is scanned with
+# window chars of context on each side, from cut to cut
+
+SENT_CUT = re.compile(r'[%s](?=\s*\n)' % re.escape(ENDINGS), re.U)
+CUT_UNSAFE = re.compile(r'[%s]' % re.escape(DELIMITERS + '=:;()'), re.U)
+
+
+def is_sent_cut(segment, text, index):
+    start = index - 1
+    size = BULLET_SIZE + 1
+    if start < size or CUT_UNSAFE.search(text, start - size, start):
+        return False
+    window = segment.split.window
+    split = SentSplit(
+        text[max(0, start - window):start],
+        text[start],
+        text[index:index + window]
+    )
+    split.buffer = text[start - size:start]
+    return not segment.join(split)
+
+
+def next_sent_cut(segment, text, pos):
+    for match in SENT_CUT.finditer(text, pos):
+        if is_sent_cut(segment, text, match.end()):
+            return match.end()
+
+
+def sent_shards(text, cuts, window):
+    for start, stop in zip(cuts, cuts[1:]):
+        pos = max(0, start - window)
+        endpos = min(len(text), stop + window)
+        yield text[pos:endpos], start - pos, stop - pos, pos
+
+
+def scan_sent_shard(segment, text, start, stop):
+    # shard ends on split, after it scan yields empty tail
+    sents = [_ for _ in segment.scan(text, start, stop) if _.text]
+    return pack_spans(sents)
+
+
+def sentenize_shard(text, start, stop):
+    return scan_sent_shard(sentenize, text, start, stop)
+
+
+def parallel_sentenize(segment, text, workers=None, executor=None):
+    count = shard_count(text, workers)
+    cuts = cut_points(text, count, partial(next_sent_cut, segment))
+    if len(cuts) < 3:
+        yield from segment.scan(text)
+        return
+
+    function = shard_function(
+        segment, executor,
+        sentenize, scan_sent_shard, sentenize_shard
+    )
+    offsets, buffers = map_shards(
+        function, sent_shards(text, cuts, segment.split.window),
+        workers, executor
+    )
+    for offset, buffer in zip(offsets, buffers):
+        for start, stop, _ in unpack_spans(buffer):
+            start += offset
+            stop += offset
+            yield Substring(start, stop, text[start:stop])
@@ -1,3 +1,36 @@
+# Segmenters load on first access, "from razdel import sentenize" does not
+# pay for tokenize rules and dictionaries
 
-from .sentenize import sentenize
-from .tokenize import tokenize
+import sys
+from types import ModuleType
+
+
+SEGMENTERS = ['sentenize', 'tokenize']
+
+__all__ = SEGMENTERS
+
+
+class Package(ModuleType):
+    # import of submodule sets package attribute to module, also when
+    # "from razdel.segmenters.tokenize import ..." goes first. Point it back
+    # to segmenter like it used to be
+    def __setattr__(self, name, value):
+        if name in SEGMENTERS and isinstance(value, ModuleType):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = Package
+
+
+def load(name):
+    from importlib import import_module
+
+    import_module('.' + name, __name__)
+    return globals()[name]
+
+
+def __getattr__(name):
+    if name in SEGMENTERS:
+        return load(name)
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
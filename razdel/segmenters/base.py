@@ -1,6 +1,10 @@
 
+from time import perf_counter
+from itertools import count
+
 from razdel.record import Record
-from razdel.rule import JOIN
+from razdel.rule import JOIN, SPLIT
+from razdel.split import Split
 from razdel.substring import find_substrings
 
 
@@ -11,12 +15,23 @@ def safe_next(iter):
         return
 
 
+def rule_name(rule):
+    return rule.name or type(rule).__name__
+
+
 class Segmenter(Record):
     __attributes__ = ['split', 'rules']
 
-    def __init__(self, split, rules):
+    def __init__(self, split, rules, observer=None, sample=1):
         self.split = split
         self.rules = rules
+        self.observer = observer
+        self.sample = sample
+        if observer:
+            # path is chosen once, without observer segment and join have
+            # no checks at all
+            self.documents = count()
+            self.segment = self.observed_segment
 
     def join(self, split):
         for rule in self.rules:
@@ -24,7 +39,33 @@ class Segmenter(Record):
             if action:
                 return action == JOIN
 
-    def segment(self, parts):
+    def decide(self, split):
+        # first rule with a verdict and the verdict, debug and profiling
+        # override it, so observed join goes through their checks
+        for rule in self.rules:
+            action = rule(split)
+            if action:
+                return rule, action
+        return None, None
+
+    def observed_join(self, split):
+        # observer gets every decision, default one has no rule
+        rule, action = self.decide(split)
+        if rule is None:
+            self.observer(split, None, SPLIT)
+            return False
+        self.observer(split, rule_name(rule), action)
+        return action == JOIN
+
+    def observed_segment(self, parts):
+        # 1 in sample documents is traced
+        segment = type(self).segment
+        if self.sample > 1 and next(self.documents) % self.sample:
+            return segment(self, parts)
+        return segment(self, parts, self.observed_join)
+
+    def segment(self, parts, join=None):
+        join = join or self.join
         buffer = safe_next(parts)
         if buffer is None:
             return
@@ -32,7 +73,7 @@ class Segmenter(Record):
         for split in parts:
             right = next(parts)
             split.buffer = buffer
-            if self.join(split):
+            if join(split):
                 buffer = buffer + split.delimiter + right
             else:
                 yield buffer + split.delimiter
@@ -48,12 +89,129 @@ class Segmenter(Record):
             chunks = self.post(chunks)
         return find_substrings(chunks, text)
 
+    def segment_list(self, text):
+        return list(self(text))
+
+    def batch(self, texts, workers=None, executor=None):
+        # Segmenters share no mutable state between calls, so texts run in
+        # threads. Scales with cores on free-threaded builds, under GIL only
+        # io of dictionaries overlaps. Returns list of lists of substrings
+        if executor is not None:
+            return list(executor.map(self.segment_list, texts))
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(self.segment_list, texts))
+
 
 class DebugSegmenter(Segmenter):
-    def join(self, split):
+    def decide(self, split):
         print("{split.left!r} | {split.delimiter!r} | {split.right!r}".format(split=split))
         for rule in self.rules:
             action = rule(split)
             if action:
                 print('\t', action, rule.name)
-                return action == JOIN
+                return rule, action
+        return None, None
+
+    def join(self, split):
+        rule, action = self.decide(split)
+        return action == JOIN
+
+
+########
+#
+#   PROFILE
+#
+######
+
+
+class RuleStats(Record):
+    __attributes__ = ['name', 'calls', 'verdicts', 'joins', 'splits', 'seconds']
+
+    def __init__(self, name, calls=0, verdicts=0, joins=0, splits=0, seconds=0.0):
+        self.name = name
+        self.calls = calls
+        self.verdicts = verdicts
+        self.joins = joins
+        self.splits = splits
+        self.seconds = seconds
+
+
+class Profile(Record):
+    # splits are all splits, ruled are those that reached rules, tokenize
+    # splits on whitespace without rules
+    __attributes__ = ['docs', 'splits', 'ruled', 'rules']
+
+    def __init__(self, rules):
+        self.docs = 0
+        self.splits = 0
+        self.ruled = 0
+        self.rules = [RuleStats(rule_name(_)) for _ in rules]
+
+    @property
+    def splits_per_doc(self):
+        return self.splits / max(self.docs, 1)
+
+    @property
+    def rules_per_split(self):
+        # per split that reached rules
+        calls = sum(_.calls for _ in self.rules)
+        return calls / max(self.ruled, 1)
+
+    def report(self):
+        yield 'docs {}, splits {}, ruled {}, splits/doc {:.1f}, rules/split {:.2f}'.format(
+            self.docs, self.splits, self.ruled,
+            self.splits_per_doc, self.rules_per_split
+        )
+        yield '{:<30} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+            'rule', 'calls', 'verdicts', 'join', 'split', 'ms'
+        )
+        for stats in sorted(self.rules, key=lambda _: -_.seconds):
+            yield '{:<30} {:>9} {:>9} {:>9} {:>9} {:>9.1f}'.format(
+                stats.name, stats.calls, stats.verdicts,
+                stats.joins, stats.splits, stats.seconds * 1000
+            )
+
+
+class ProfilingSegmenter(Segmenter):
+    # Counters instead of prints. Not thread safe, profile one stream of
+    # documents at a time. Goes first in bases so __call__ counts documents
+    # of any segmenter
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profile = Profile(self.rules)
+
+    def counted(self, parts):
+        for part in parts:
+            if isinstance(part, Split):
+                self.profile.splits += 1
+            yield part
+
+    def segment(self, parts, join=None):
+        return super().segment(self.counted(parts), join)
+
+    def decide(self, split):
+        self.profile.ruled += 1
+        for rule, stats in zip(self.rules, self.profile.rules):
+            start = perf_counter()
+            action = rule(split)
+            stats.seconds += perf_counter() - start
+            stats.calls += 1
+            if action:
+                stats.verdicts += 1
+                if action == JOIN:
+                    stats.joins += 1
+                elif action == SPLIT:
+                    stats.splits += 1
+                return rule, action
+        return None, None
+
+    def join(self, split):
+        rule, action = self.decide(split)
+        return action == JOIN
+
+    def __call__(self, text, *args, **kwargs):
+        self.profile.docs += 1
+        return super().__call__(text, *args, **kwargs)
@@ -1,5 +1,6 @@
 
 import re
+from itertools import islice
 
 from razdel.record import (
     Record,
@@ -25,7 +26,12 @@ from .punct import (
     SMILES
 )
 
-from .sokr import SOKRS, PAIR_SOKRS
+from .dictionaries import (
+    CACHE_SIZE,
+    BaseWordDictionary,
+    DictionaryHolder
+)
+from .dictionaries import DefAbbrsWordDictionary  # noqa, used to live here
 
 RU = 'RU'
 LAT = 'LAT'
@@ -57,7 +63,8 @@ DOI_REGEXP = r'doi:\s?10\.\d+' + _URI_FULL_VALID_PATH_REGEXP
 
 EMAIL_REGEXP = r"\b[a-z0-9.!#$%&'*+/=?^_`{|}~-]+@[a-z0-9.-]{1,256}\b"
 
-ATOM = re.compile(
+# compiled on first use, import razdel stays cheap
+ATOM_PATTERN = (
     rf'''
     (?P<URI>{URI_WITH_HOST_REGEXP})
     |(?P<DOI>{DOI_REGEXP})
@@ -68,9 +75,18 @@ ATOM = re.compile(
     |(?P<INT>\d+)
     |(?P<PUNCT>[{re.escape(PUNCTS)}])
     |(?P<OTHER>\S)
-    ''',
-    re.I | re.U | re.X
+    '''
 )
+ATOM_FLAGS = re.I | re.U | re.X
+
+
+def __getattr__(name):
+    # ATOM used to be compiled at import, compiled once on first access
+    if name == 'ATOM':
+        atom = re.compile(ATOM_PATTERN, ATOM_FLAGS)
+        globals()[name] = atom
+        return atom
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
 
 SMILE = re.compile(r'^' + SMILES + '$', re.U)
 
@@ -112,48 +128,25 @@ def clean_uri_atom(uri_text):
 ######
 
 
-class BaseWordDictionary:
-    def is_word_known(self, word:str, lang: str):
-        return False
+# process-wide dictionaries used by segmenters without their own
+DICTIONARIES = DictionaryHolder()
 
-_WORDS_DICTIONARY = None
-
-def init_words_dictionary(words_dict):
-    global _WORDS_DICTIONARY
-    _WORDS_DICTIONARY = words_dict
 
+def init_words_dictionary(words_dict, cache_size=CACHE_SIZE):
+    # lookups are memoized by (word, lang), pass cache_size=0 to opt out
+    DICTIONARIES.swap(words_dict=words_dict, cache_size=cache_size)
 
 
 def get_words_dictionary()->BaseWordDictionary:
-    global _WORDS_DICTIONARY
-    if _WORDS_DICTIONARY is None:
-        #by default init with empty dict
-        _WORDS_DICTIONARY = BaseWordDictionary()
-    return _WORDS_DICTIONARY
-
-class DefAbbrsWordDictionary(BaseWordDictionary):
-    def __init__(self) -> None:
-        self._known_pair_abbrs = frozenset(' '.join(a) for a in PAIR_SOKRS)
+    return DICTIONARIES.snapshot.words_dict
 
-    def is_word_known(self, word:str, lang: str):
-        if word in SOKRS:
-            return True
-        return word in self._known_pair_abbrs
 
+def init_abbrevs_dictionary(abbrevs_dict, cache_size=CACHE_SIZE):
+    DICTIONARIES.swap(abbrevs_dict=abbrevs_dict, cache_size=cache_size)
 
-_ABBREVS_DICTIONARY = None
-
-
-def init_abbrevs_dictionary(abbrevs_dict):
-    global _ABBREVS_DICTIONARY
-    _ABBREVS_DICTIONARY = abbrevs_dict
 
 def get_abbrevs_dictionary()->BaseWordDictionary:
-    global _ABBREVS_DICTIONARY
-    if _ABBREVS_DICTIONARY is None:
-        #by default init with abrrevs from sokr module
-        _ABBREVS_DICTIONARY = DefAbbrsWordDictionary()
-    return _ABBREVS_DICTIONARY
+    return DICTIONARIES.snapshot.abbrevs_dict
 
 
 ##########
@@ -192,6 +185,21 @@ class Rule2112(Rule):
         return self.rule(left, right)
 
 
+def dash_word(left_2, left, right, right_2):
+    prefix = ''
+    if left_2 and left_2.text in DASHES and left_2.stop == left.start:
+        # state-\of|-the-art
+        prefix = '-'
+    suffix = ''
+    if right_2 and right_2.text in DASHES and right.stop == right_2.start:
+        # state-of|-the/-art
+        suffix = '-'
+    word = prefix + left.text + '-' + right.text + suffix
+
+    lang = 'ru' if left.type == RU or right.type == RU else 'en'
+    return word, lang
+
+
 class DashRule(Rule):
     name = 'dash'
 
@@ -226,20 +234,8 @@ class DashRule(Rule):
 
         if left.type in (RU, LAT) and right.type in (RU, LAT):
             # keep this as single token if it is found in dictionary, split otherwise
-            words_dict = get_words_dictionary()
-
-            prefix = ''
-            if left_2 and left_2.text in DASHES and left_2.stop == left.start:
-                #state-\of|-the-art
-                prefix = '-'
-            suffix = ''
-            if right_2 and right_2.text in DASHES and right.stop == right_2.start:
-                #state-of|-the/-art
-                suffix = '-'
-            word = prefix + left.text + '-' + right.text + suffix
-
-            lang = 'ru' if left.type == RU or right.type == RU else 'en'
-            if words_dict.is_word_known(word, lang):
+            word, lang = dash_word(left_2, left, right, right_2)
+            if split.words_dict.is_word_known(word, lang):
                 return JOIN
 
 
@@ -336,29 +332,31 @@ class InsideDigitsRule(Rule):
 #
 ##########
 
-def abbrevs(split: "TokenSplit"):
-    def _det_lang(atom:"Atom"):
-        return 'ru' if atom.type == RU else 'en'
+def abbrev_lang(atom:"Atom"):
+    return 'ru' if atom.type == RU else 'en'
+
+
+def abbrev_pair(first:"Atom", second:"Atom"):
+    return f'{first.normal} {second.normal}', abbrev_lang(first)
+
 
+def abbrevs(split: "TokenSplit"):
     #detect pair abbrevs
     pair = None
     between_pair = False
     lang = None
     if split.right == '.' and split.right_3 and split.right_3.text == '.':
         #т|.д.
-        pair = f'{split.left_1.normal} {split.right_2.normal}'
-        lang = _det_lang(split.left_1)
+        pair, lang = abbrev_pair(split.left_1, split.right_2)
     if split.left_2 and split.left == '.' and split.right_2 and split.right_2.text == '.':
         #т.|д.
-        pair = f'{split.left_2.normal} {split.right_1.normal}'
-        lang = _det_lang(split.left_2)
+        pair, lang = abbrev_pair(split.left_2, split.right_1)
         between_pair = True
     if split.left_3 and split.left_2 and split.left_2.text == '.' and split.right == '.':
         #т.д|.
-        pair = f'{split.left_3.normal} {split.left_1.normal}'
-        lang = _det_lang(split.left_3)
+        pair, lang = abbrev_pair(split.left_3, split.left_1)
 
-    abbrevs_dict = get_abbrevs_dictionary()
+    abbrevs_dict = split.abbrevs_dict
     if pair is not None and lang is not None:
         if not between_pair:
             if abbrevs_dict.is_word_known(pair, lang):
@@ -373,29 +371,61 @@ def abbrevs(split: "TokenSplit"):
 
         if len(split.left) == 1 and split.left.isupper():
             return JOIN
-        lang = _det_lang(split.left_1)
+        lang = abbrev_lang(split.left_1)
         if abbrevs_dict.is_word_known(split.left_1.normal, lang):
             return JOIN
 
 
+#########
+#
+#  Dictionary candidates
+#
+##########
+
+
+def dictionary_candidates(atoms):
+    # mirrors lookups of DashRule and abbrevs, so batched dictionaries can
+    # answer them in one round trip. A word missed here is still looked up
+    # by the rule one by one
+    words, abbrevs = set(), set()
+    size = len(atoms)
+    for index, atom in enumerate(atoms):
+        if atom.text in DASHES and 0 < index < size - 1:
+            left, right = atoms[index - 1], atoms[index + 1]
+            if left.type in (RU, LAT) and right.type in (RU, LAT):
+                left_2 = atoms[index - 2] if index > 1 else None
+                right_2 = atoms[index + 2] if index + 2 < size else None
+                words.add(dash_word(left_2, left, right, right_2))
+
+        elif atom.text == '.' and index > 0:
+            left = atoms[index - 1]
+            abbrevs.add((left.normal, abbrev_lang(left)))
+            if index + 2 < size and atoms[index + 2].text == '.':
+                abbrevs.add(abbrev_pair(left, atoms[index + 1]))
+
+    return words, abbrevs
+
+
 #########
 #
 #  MISC alphanumeric identifiers: Model names, ids, etc.
 #
 ##########
 
+ALPHANUM_ID = re.compile(r'^[@#]?\w++[\w_–-]*+')
+
+
 def alphanum_ids(split: "TokenSplit"):
     assert split.buffer is not None, "Logic error 12"
-    alphanum_id_regex = r'^[@#]?\w++[\w_–-]*+'
 
-    if (split.right_1.type == INT and re.fullmatch(alphanum_id_regex, split.buffer) is not None):
+    if (split.right_1.type == INT and ALPHANUM_ID.fullmatch(split.buffer) is not None):
         #MP3, А4, XR4Ti
         return JOIN
 
     if (split.left_1.type == INT
         and (split.right_1.text in DASHES or split.right_1.type in (LAT, RU))
         and not split.buffer.isdigit()
-        and re.fullmatch(alphanum_id_regex, split.buffer) is not None
+        and ALPHANUM_ID.fullmatch(split.buffer) is not None
         ):
         # x3-9890
         return JOIN
@@ -482,9 +512,11 @@ class Atom(Record):
 
 
 class TokenSplit(Split):
-    def __init__(self, left, delimiter, right):
+    def __init__(self, left, delimiter, right, words_dict=None, abbrevs_dict=None):
         self.left_atoms = left
         self.right_atoms = right
+        self.words_dict = words_dict
+        self.abbrevs_dict = abbrevs_dict
         super(TokenSplit, self).__init__(
             self.left_1.text,
             delimiter,
@@ -521,10 +553,17 @@ class TokenSplit(Split):
 
 
 
+ATOMS_CHUNK = 1024
+
+
 class TokenSplitter(Splitter):
     def __init__(self, window=3):
         self.window = window
 
+    @cached_property
+    def re(self):
+        return re.compile(ATOM_PATTERN, ATOM_FLAGS)
+
     def _create_atoms_from_uri(self, match, atom_type):
         uri_text = match.group(0)
         cleaned_uri_text = clean_uri_atom(uri_text)
@@ -533,16 +572,20 @@ class TokenSplitter(Splitter):
         yield Atom(uri_start, uri_end, atom_type, cleaned_uri_text)
 
         rest_atoms = len(uri_text) - len(cleaned_uri_text)
-        atom_start = uri_end - uri_start
+        atom_start = uri_end
 
         while rest_atoms:
-            yield Atom(atom_start, atom_start+1, PUNCT, uri_text[atom_start])
+            yield Atom(atom_start, atom_start+1, PUNCT, uri_text[atom_start - uri_start])
             rest_atoms -= 1
             atom_start += 1
 
 
-    def atoms(self, text):
-        matches = ATOM.finditer(text)
+    def atoms(self, text, pos=0, endpos=None):
+        # pos and endpos should be at whitespace boundaries, see
+        # razdel.incremental
+        if endpos is None:
+            endpos = len(text)
+        matches = self.re.finditer(text, pos, endpos)
         for match in matches:
             atom_type = match.lastgroup
             if atom_type in (URI, DOI, DOMAIN, EMAIL):
@@ -556,17 +599,39 @@ class TokenSplitter(Splitter):
                     atom_type, text
                 )
 
-    def __call__(self, text):
-        atoms = list(self.atoms(text))
-        for index in range(len(atoms)):
-            atom = atoms[index]
-            if index > 0:
-                previous = atoms[index - 1]
+    def splits(self, text, atoms, words_dict, abbrevs_dict):
+        # atoms are consumed lazily, by chunks, so memory does not grow with
+        # the document and a consumer may pause between tokens
+        window = self.window
+        atoms = iter(atoms)
+        buffer = list(islice(atoms, ATOMS_CHUNK))
+        index = 0
+        previous = None
+        while index < len(buffer):
+            if index + window > len(buffer):
+                more = list(islice(atoms, ATOMS_CHUNK))
+                if more:
+                    start = max(0, index - window)
+                    buffer = buffer[start:] + more
+                    index -= start
+
+            atom = buffer[index]
+            if previous is not None:
                 delimiter = text[previous.stop:atom.start]
-                left = atoms[max(0, index - self.window):index]
-                right = atoms[index:index + self.window]
-                yield TokenSplit(left, delimiter, right)
+                left = buffer[max(0, index - window):index]
+                right = buffer[index:index + window]
+                yield TokenSplit(left, delimiter, right, words_dict, abbrevs_dict)
             yield atom.text, atom.type
+            previous = atom
+            index += 1
+
+    def __call__(self, text):
+        atoms = self.atoms(text)
+        return self.splits(
+            text, atoms,
+            get_words_dictionary(),
+            get_abbrevs_dictionary()
+        )
 
 
 COMMON_RULES = [
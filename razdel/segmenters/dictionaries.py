@@ -0,0 +1,547 @@
+
+import os
+import sys
+import array
+import struct
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+from razdel.record import Record
+
+from .sokr import SOKRS, PAIR_SOKRS
+
+
+##########
+#
+#  BASE
+#
+######
+
+
+class BaseWordDictionary:
+    # batched dictionaries get all candidates of a document in a single
+    # lookup_many call before the rules run, see prefetch_dictionary
+    batched = False
+
+    def is_word_known(self, word: str, lang: str):
+        return False
+
+    def lookup_many(self, words, lang: str):
+        return {_ for _ in words if self.is_word_known(_, lang)}
+
+
+class DefAbbrsWordDictionary(BaseWordDictionary):
+    def __init__(self) -> None:
+        self._known_pair_abbrs = frozenset(' '.join(a) for a in PAIR_SOKRS)
+
+    def is_word_known(self, word: str, lang: str):
+        if word in SOKRS:
+            return True
+        return word in self._known_pair_abbrs
+
+
+class SetWordDictionary(BaseWordDictionary):
+    def __init__(self, words) -> None:
+        self.words = frozenset(words)
+
+    def is_word_known(self, word: str, lang: str):
+        return word in self.words
+
+
+##########
+#
+#  CACHE
+#
+######
+
+
+CACHE_SIZE = 2 ** 16
+
+
+class CachedWordDictionary(BaseWordDictionary):
+    def __init__(self, words_dict, size=CACHE_SIZE) -> None:
+        self.words_dict = words_dict
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def batched(self):
+        return self.words_dict.batched
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        if total:
+            return self.hits / total
+        return 0.0
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def is_word_known(self, word: str, lang: str):
+        key = (word, lang)
+        with self._lock:
+            known = self._cache.get(key)
+            if known is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return known
+            self.misses += 1
+
+        # slow lookup runs outside of the lock, concurrent misses on the same
+        # key may both hit words_dict, that is fine
+        known = bool(self.words_dict.is_word_known(word, lang))
+        with self._lock:
+            self._cache[key] = known
+            if len(self._cache) > self.size:
+                self._cache.popitem(last=False)
+        return known
+
+    def lookup_many(self, words, lang: str):
+        known, missing = set(), []
+        with self._lock:
+            for word in words:
+                key = (word, lang)
+                found = self._cache.get(key)
+                if found is None:
+                    missing.append(word)
+                    continue
+                self._cache.move_to_end(key)
+                if found:
+                    known.add(word)
+            self.hits += len(words) - len(missing)
+            self.misses += len(missing)
+
+        if not missing:
+            return known
+
+        found = self.words_dict.lookup_many(missing, lang)
+        with self._lock:
+            for word in missing:
+                self._cache[word, lang] = word in found
+            while len(self._cache) > self.size:
+                self._cache.popitem(last=False)
+        known.update(found)
+        return known
+
+
+def cached_dictionary(words_dict, size=CACHE_SIZE):
+    if not size or isinstance(words_dict, CachedWordDictionary):
+        return words_dict
+    return CachedWordDictionary(words_dict, size)
+
+
+##########
+#
+#  PREFETCH
+#
+######
+
+
+class PrefetchedWordDictionary(BaseWordDictionary):
+    def __init__(self, words_dict, known) -> None:
+        self.words_dict = words_dict
+        self.known = known
+
+    def is_word_known(self, word: str, lang: str):
+        known = self.known.get((word, lang))
+        if known is None:
+            return self.words_dict.is_word_known(word, lang)
+        return known
+
+
+def prefetch_dictionary(words_dict, candidates):
+    langs = {}
+    for word, lang in candidates:
+        langs.setdefault(lang, []).append(word)
+
+    known = {}
+    for lang, words in langs.items():
+        found = words_dict.lookup_many(words, lang)
+        for word in words:
+            known[word, lang] = word in found
+    return PrefetchedWordDictionary(words_dict, known)
+
+
+##########
+#
+#  SNAPSHOTS
+#
+######
+
+
+class DictionarySnapshot(Record):
+    __attributes__ = ['version', 'words_dict', 'abbrevs_dict']
+
+    def __init__(self, version, words_dict, abbrevs_dict):
+        self.version = version
+        self.words_dict = words_dict
+        self.abbrevs_dict = abbrevs_dict
+
+
+# swap argument for dictionary that stays as is
+KEEP = object()
+
+
+def default_words_dictionary(words_dict):
+    if words_dict is None:
+        # by default init with empty dict
+        return BaseWordDictionary()
+    return words_dict
+
+
+def default_abbrevs_dictionary(abbrevs_dict):
+    if abbrevs_dict is None:
+        # by default init with abrrevs from sokr module
+        return DefAbbrsWordDictionary()
+    return abbrevs_dict
+
+
+class DictionaryHolder:
+    # Segmenter reads the snapshot once per document, so swap never changes
+    # dictionaries under a running document. Caches live inside the snapshot
+    # dictionaries and go away with their version
+    def __init__(self, words_dict=None, abbrevs_dict=None,
+                 cache_size=CACHE_SIZE) -> None:
+        # given dictionaries are memoized as in swap
+        if words_dict is not None:
+            words_dict = cached_dictionary(words_dict, cache_size)
+        if abbrevs_dict is not None:
+            abbrevs_dict = cached_dictionary(abbrevs_dict, cache_size)
+        self._words_dict = words_dict
+        self._abbrevs_dict = abbrevs_dict
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def init_snapshot(self):
+        # first snapshot is built lazily, DefAbbrsWordDictionary is not
+        # loaded at import
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = DictionarySnapshot(
+                        1,
+                        default_words_dictionary(self._words_dict),
+                        default_abbrevs_dictionary(self._abbrevs_dict)
+                    )
+                snapshot = self._snapshot
+        return snapshot
+
+    @property
+    def snapshot(self):
+        return self.init_snapshot()
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    def swap(self, words_dict=KEEP, abbrevs_dict=KEEP, cache_size=CACHE_SIZE):
+        # KEEP keeps dictionary of the current snapshot, None resets to
+        # default one like init_words_dictionary(None) always did
+        if words_dict is not KEEP and words_dict is not None:
+            words_dict = cached_dictionary(words_dict, cache_size)
+        if abbrevs_dict is not KEEP and abbrevs_dict is not None:
+            abbrevs_dict = cached_dictionary(abbrevs_dict, cache_size)
+
+        self.init_snapshot()  # outside of the lock, it is not reentrant
+        with self._lock:
+            current = self._snapshot
+            if words_dict is KEEP:
+                words_dict = current.words_dict
+            if abbrevs_dict is KEEP:
+                abbrevs_dict = current.abbrevs_dict
+            snapshot = DictionarySnapshot(
+                current.version + 1,
+                default_words_dictionary(words_dict),
+                default_abbrevs_dictionary(abbrevs_dict)
+            )
+            self._snapshot = snapshot
+        return snapshot
+
+    def reload(self, loader, cache_size=CACHE_SIZE):
+        # loader returns (words_dict, abbrevs_dict) and runs in a background
+        # thread, segmentation keeps using the current snapshot meanwhile
+        from concurrent.futures import Future
+
+        future = Future()
+
+        def run():
+            try:
+                words_dict, abbrevs_dict = loader()
+                snapshot = self.swap(words_dict, abbrevs_dict, cache_size)
+            except BaseException as error:
+                future.set_exception(error)
+            else:
+                future.set_result(snapshot)
+
+        thread = threading.Thread(target=run, name='razdel-reload', daemon=True)
+        thread.start()
+        return future
+
+
+##########
+#
+#  MMAP
+#
+######
+
+# Layout of the compiled dictionary file, all integers are little-endian
+# uint32:
+#   magic | count | offsets[count + 1] | utf-8 words, sorted bytewise
+# Word i occupies data[offsets[i]:offsets[i + 1]]. Bytewise order of utf-8
+# matches codepoint order, so lookup is a plain binary search.
+
+MMAP_MAGIC = b'RZDLWD01'
+MMAP_HEADER = struct.Struct('<8sI')
+MMAP_OFFSET = struct.Struct('<I')
+
+# every MMAP_FENCE-th word is copied to memory, bisect over this small list
+# runs in C and leaves only a few probes into the mapped file
+MMAP_FENCE = 64
+
+
+def compile_words_dictionary(words, path):
+    items = sorted({_.encode('utf8') for _ in words})
+
+    offsets = [0]
+    for item in items:
+        offsets.append(offsets[-1] + len(item))
+    if offsets[-1] > 0xFFFFFFFF:
+        raise ValueError('dictionary data is larger than 4GB')
+
+    # write aside and rename, readers that have the old file mapped keep
+    # working on the old inode
+    temp = path + '.tmp'
+    with open(temp, 'wb') as file:
+        file.write(MMAP_HEADER.pack(MMAP_MAGIC, len(items)))
+        file.write(struct.pack('<%dI' % len(offsets), *offsets))
+        for item in items:
+            file.write(item)
+    os.replace(temp, path)
+    return len(items)
+
+
+def offsets_table(view, byteorder=sys.byteorder):
+    # table is little endian in file, on little endian host it is used in
+    # place
+    if byteorder == 'little':
+        return view.cast('I')
+    # private copy, rare platforms pay with memory
+    offsets = array.array('I')
+    offsets.frombytes(view)
+    offsets.byteswap()
+    return offsets
+
+
+class MmapWordDictionary(BaseWordDictionary):
+    def __init__(self, path) -> None:
+        import mmap
+
+        self.path = path
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = self._offsets = None
+        try:
+            self._load()
+        except ValueError:
+            self.close()
+            raise
+
+    def _load(self):
+        # truncated or corrupt file is rejected here, lookups do not check
+        # bounds
+        size = len(self._mmap)
+        if size < MMAP_HEADER.size:
+            raise ValueError('%r is not a compiled words dictionary' % self.path)
+        magic, self.size = MMAP_HEADER.unpack_from(self._mmap, 0)
+        if magic != MMAP_MAGIC:
+            raise ValueError('%r is not a compiled words dictionary' % self.path)
+
+        start = MMAP_HEADER.size
+        self._data = start + (self.size + 1) * MMAP_OFFSET.size
+        if self._data > size:
+            raise ValueError('%r offsets table is truncated' % self.path)
+        self._view = memoryview(self._mmap)[start:self._data]
+        self._offsets = offsets_table(self._view)
+        if self._offsets[0] != 0 or self._data + self._offsets[self.size] != size:
+            raise ValueError('%r words data is truncated' % self.path)
+
+        self._fence = [
+            self._item(index)
+            for index in range(0, self.size, MMAP_FENCE)
+        ]
+
+    def __len__(self):
+        return self.size
+
+    def __reduce__(self):
+        # workers reopen the file and share its pages through the page cache
+        return (self.__class__, (self.path,))
+
+    def close(self):
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        if self._view is not None:
+            self._view.release()
+        self._mmap.close()
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield self._item(index).decode('utf8')
+
+    def _item(self, index):
+        data = self._data
+        offsets = self._offsets
+        return self._mmap[data + offsets[index]:data + offsets[index + 1]]
+
+    def is_word_known(self, word: str, lang: str):
+        key = word.encode('utf8')
+        data = self._data
+        offsets = self._offsets
+        buffer = self._mmap
+        lo = (bisect_right(self._fence, key) - 1) * MMAP_FENCE
+        if lo < 0:
+            return False
+        hi = min(lo + MMAP_FENCE, self.size)
+        while lo < hi:
+            middle = (lo + hi) // 2
+            item = buffer[data + offsets[middle]:data + offsets[middle + 1]]
+            if item < key:
+                lo = middle + 1
+            elif item > key:
+                hi = middle
+            else:
+                return True
+        return False
+
+
+##########
+#
+#  SQLITE
+#
+######
+
+
+SQLITE_BATCH = 256
+
+
+def sqlite_name(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+def compile_sqlite_dictionary(words, path, table='words', column='word'):
+    import sqlite3
+
+    table, column = sqlite_name(table), sqlite_name(column)
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute('DROP TABLE IF EXISTS %s' % table)
+        connection.execute(
+            'CREATE TABLE %s (%s TEXT PRIMARY KEY) WITHOUT ROWID' % (table, column)
+        )
+        connection.executemany(
+            'INSERT OR IGNORE INTO %s VALUES (?)' % table,
+            ((_,) for _ in words)
+        )
+    connection.close()
+
+
+class SqliteWordTable(BaseWordDictionary):
+    batched = True
+
+    def __init__(self, path, table='words', column='word', lang_column=None) -> None:
+        self.path = path
+        self.table = table
+        self.column = column
+        self.lang_column = lang_column
+
+        where = '%s = ?' % sqlite_name(column)
+        many = '%s IN (%s)' % (sqlite_name(column), ', '.join('?' * SQLITE_BATCH))
+        if lang_column:
+            where += ' AND %s = ?' % sqlite_name(lang_column)
+            many += ' AND %s = ?' % sqlite_name(lang_column)
+        # same sql text every time, sqlite3 keeps statements prepared in its
+        # per-connection cache
+        self._one = 'SELECT 1 FROM %s WHERE %s LIMIT 1' % (sqlite_name(table), where)
+        self._many = 'SELECT %s FROM %s WHERE %s' % (
+            sqlite_name(column), sqlite_name(table), many
+        )
+
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return (
+            self.__class__,
+            (self.path, self.table, self.column, self.lang_column)
+        )
+
+    @property
+    def connection(self):
+        # sqlite3 connections must not be shared between threads, every
+        # thread opens its own read-only one
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            import sqlite3
+            from urllib.request import pathname2url
+
+            uri = 'file:%s?mode=ro' % pathname2url(os.path.abspath(self.path))
+            # check_same_thread=False only lets close() run from any thread,
+            # queries always go through the owner thread connection
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
+
+    def is_word_known(self, word: str, lang: str):
+        args = (word, lang) if self.lang_column else (word,)
+        rows = self.connection.execute(self._one, args)
+        return rows.fetchone() is not None
+
+    def lookup_many(self, words, lang: str):
+        words = list(words)
+        known = set()
+        connection = self.connection
+        for start in range(0, len(words), SQLITE_BATCH):
+            batch = words[start:start + SQLITE_BATCH]
+            # pad the tail to keep one prepared statement
+            batch += batch[:1] * (SQLITE_BATCH - len(batch))
+            if self.lang_column:
+                batch.append(lang)
+            for word, in connection.execute(self._many, batch):
+                known.add(word)
+        return known
+
+
+class SqliteWordDictionary(CachedWordDictionary):
+    def __init__(self, path, table='words', column='word', lang_column=None,
+                 cache_size=CACHE_SIZE) -> None:
+        table = SqliteWordTable(path, table, column, lang_column)
+        super().__init__(table, cache_size)
+
+    def __reduce__(self):
+        table = self.words_dict
+        return (
+            self.__class__,
+            (table.path, table.table, table.column, table.lang_column, self.size)
+        )
+
+    def close(self):
+        self.words_dict.close()
@@ -65,32 +65,32 @@ def _enhance_special_tokens(token_pairs):
 
     return new_variants_dict
 
+# Lazy tables below are built into a local and published with a single
+# assignment: concurrent first calls (free-threaded builds included) may build
+# the same table twice but never see a half-built one.
+
 def _get_special_en_tokens():
     global _SPECIAL_EN_TOKENS
-    if _SPECIAL_EN_TOKENS is None:
-        _SPECIAL_EN_TOKENS = copy.copy(_SPECIAL_EN_TOKENS_BASE)
-        _SPECIAL_EN_TOKENS.update(_enhance_special_tokens(_SPECIAL_EN_TOKENS_BASE))
-
-    return _SPECIAL_EN_TOKENS
+    tokens = _SPECIAL_EN_TOKENS
+    if tokens is None:
+        tokens = copy.copy(_SPECIAL_EN_TOKENS_BASE)
+        tokens.update(_enhance_special_tokens(_SPECIAL_EN_TOKENS_BASE))
+        _SPECIAL_EN_TOKENS = tokens
+    return tokens
 
 def _get_specian_en_prefixes():
     global _SPECIAL_EN_PREFIXES
-    if _SPECIAL_EN_PREFIXES is None:
+    prefixes = _SPECIAL_EN_PREFIXES
+    if prefixes is None:
         temp = []
         for key in _SPECIAL_EN_TOKENS_BASE:
             idx = key.find("'")
             if idx == -1:
                 continue
             temp.append(key[:idx])
-        _SPECIAL_EN_PREFIXES = frozenset(temp)
-    return _SPECIAL_EN_PREFIXES
-
-    
-
-
-
+        prefixes = _SPECIAL_EN_PREFIXES = frozenset(temp)
+    return prefixes
 
-    
 
 class ApostropheRule(Rule2112):
     name = 'apostrophe'
@@ -10,10 +10,16 @@ from razdel.split import (
     Split,
     Splitter,
 )
+from razdel.spans import NO_TYPE
+from razdel.substring import (
+    find_substrings,
+    unit_offsets
+)
 
 from .base import (
     Segmenter,
-    DebugSegmenter
+    DebugSegmenter,
+    ProfilingSegmenter
 )
 from .sokr import (
     HEAD_SOKRS,
@@ -304,14 +310,21 @@ class SentSplitter(Splitter):
     def __init__(self, pattern=DELIMITER, window=10):
         self.pattern = pattern
         self.window = window
-        self.re = re.compile(pattern, re.U)
 
-    def __call__(self, text):
+    @cached_property
+    def re(self):
+        return re.compile(self.pattern, re.U)
+
+    def __call__(self, text, pos=0, endpos=None):
+        # pos is start of text or end of delimiter, windows look outside of
+        # [pos, endpos) so part of text is split as in the whole
         if not text.strip():
             return
 
-        matches = self.re.finditer(text)
-        previous = 0
+        if endpos is None:
+            endpos = len(text)
+        matches = self.re.finditer(text, pos, endpos)
+        previous = pos
         for match in matches:
             start = match.start()
             stop = match.end()
@@ -321,7 +334,7 @@ class SentSplitter(Splitter):
             right = text[stop:stop + self.window]
             yield SentSplit(left, delimiter, right)
             previous = stop
-        yield text[previous:]
+        yield text[previous:endpos]
 
 
 ########
@@ -351,20 +364,63 @@ RULES = [FunctionRule(_) for _ in [
 
 
 class SentSegmenter(Segmenter):
-    def __init__(self, split=SentSplitter(), rules=RULES):
-        super(SentSegmenter, self).__init__(split, rules)
+    def __init__(self, split=SentSplitter(), rules=RULES, observer=None, sample=1):
+        super(SentSegmenter, self).__init__(split, rules, observer, sample)
 
     @property
     def debug(self):
-        return DebugSentSegmenter()
+        return DebugSentSegmenter(
+            self.split, self.rules,
+            observer=self.observer, sample=self.sample
+        )
+
+    @property
+    def profiling(self):
+        return ProfilingSentSegmenter(
+            self.split, self.rules,
+            observer=self.observer, sample=self.sample
+        )
+
+    def __call__(self, text, workers=None, executor=None, unit=None):
+        # with workers or executor huge text is cut in shards, see
+        # razdel.pool.parallel_sentenize. unit is "utf-8" or "utf-16" for
+        # offsets in encoded text
+        if workers is None and executor is None:
+            sents = super(SentSegmenter, self).__call__(text)
+        else:
+            from razdel.pool import parallel_sentenize
+            sents = parallel_sentenize(self, text, workers, executor)
+        return unit_offsets(sents, text, unit)
 
     def post(self, chunks):
         for chunk in chunks:
             yield chunk.strip()
 
+    def scan(self, text, pos=0, endpos=None):
+        # sentences of text[pos:endpos] with offsets in text, pos is sentence
+        # boundary of the whole text
+        parts = self.split(text, pos, endpos)
+        chunks = self.post(self.segment(parts))
+        return find_substrings(chunks, text, pos)
+
+    def spans(self, text):
+        # (start, stop, -1) tuples, no Substring objects, see razdel.arrow
+        parts = self.split(text)
+        chunks = self.post(self.segment(parts))
+
+        offset = 0
+        for chunk in chunks:
+            start = text.find(chunk, offset)
+            offset = start + len(chunk)
+            yield start, offset, NO_TYPE
+
 
 class DebugSentSegmenter(SentSegmenter, DebugSegmenter):
     pass
 
 
+class ProfilingSentSegmenter(ProfilingSegmenter, SentSegmenter):
+    pass
+
+
 sentenize = SentSegmenter()
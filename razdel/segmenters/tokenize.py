@@ -3,14 +3,18 @@
 import enum
 
 from razdel.rule import JOIN, FunctionRule
-from razdel.substring import Substring
+from razdel.substring import (
+    Substring,
+    unit_offsets
+)
 
 from .punct import DASHES, APOSTROPHES
 
 from .base import (
     safe_next,
     Segmenter,
-    DebugSegmenter
+    DebugSegmenter,
+    ProfilingSegmenter
 )
 
 from .common_tokenize import (
@@ -19,7 +23,16 @@ from .common_tokenize import (
     TokenSplit,
     Rule2112,
     COMMON_RULES,
-    DOMAIN
+    DOMAIN,
+    DICTIONARIES,
+    dictionary_candidates,
+    get_words_dictionary,
+    get_abbrevs_dictionary
+)
+from .dictionaries import (
+    CACHE_SIZE,
+    DictionaryHolder,
+    prefetch_dictionary
 )
 
 from .en_support import (
@@ -167,6 +180,12 @@ class TokenType(enum.IntEnum):
     OTHER  = 8
     UNK    = 127
 
+
+# atom type to int TokenType, for spans without enum members
+TOKEN_TYPES = {_.name: int(_) for _ in TokenType}
+TOKEN_TYPES[DOMAIN] = int(TokenType.DOMAIN)
+
+
 def token_type_from_atom(atom_type:str):
     if atom_type == DOMAIN:
         atom_type = 'DOMAIN'
@@ -186,10 +205,51 @@ class Token(Substring):
 
 
 class TokenSegmenter(Segmenter):
-    def __init__(self, split=TokenSplitter(), rules=RULES):
-        super().__init__(split, rules)
+    __attributes__ = ['split', 'rules', 'dictionaries']
+
+    def __init__(self, split=TokenSplitter(), rules=RULES,
+                 words_dict=None, abbrevs_dict=None, dictionaries=None,
+                 observer=None, sample=1, cache_size=CACHE_SIZE):
+        super().__init__(split, rules, observer, sample)
+        if dictionaries is None:
+            if words_dict is None and abbrevs_dict is None:
+                # follow init_words_dictionary/init_abbrevs_dictionary
+                dictionaries = DICTIONARIES
+            else:
+                # segmenter owns its dictionaries, missing one is resolved
+                # once, here. Lookups are memoized as with init_*
+                if words_dict is None:
+                    words_dict = get_words_dictionary()
+                if abbrevs_dict is None:
+                    abbrevs_dict = get_abbrevs_dictionary()
+                dictionaries = DictionaryHolder(
+                    words_dict, abbrevs_dict,
+                    cache_size=cache_size
+                )
+        self.dictionaries = dictionaries
+
+    # words_dict and abbrevs_dict were plain attributes, now they are
+    # dictionaries of the current snapshot, setting one gives segmenter own
+    # holder
+
+    @property
+    def words_dict(self):
+        return self.dictionaries.snapshot.words_dict
+
+    @words_dict.setter
+    def words_dict(self, words_dict):
+        self.dictionaries = DictionaryHolder(words_dict, self.abbrevs_dict)
+
+    @property
+    def abbrevs_dict(self):
+        return self.dictionaries.snapshot.abbrevs_dict
 
-    def segment(self, parts):
+    @abbrevs_dict.setter
+    def abbrevs_dict(self, abbrevs_dict):
+        self.dictionaries = DictionaryHolder(self.words_dict, abbrevs_dict)
+
+    def segment(self, parts, join=None):
+        join = join or self.join
         #first time parts yields texts of the first atom
         t = safe_next(parts)
         if t is None:
@@ -202,7 +262,7 @@ class TokenSegmenter(Segmenter):
             #it the the text of the current atom
             right, next_atom_type = next(parts)
             split.buffer = buffer
-            if not split.delimiter and self.join(split):
+            if not split.delimiter and join(split):
                 buffer += right
                 #Merging of multiple atoms makes the original atom type not
                 #relevant. It would be great if join returns new atom type but
@@ -217,26 +277,82 @@ class TokenSegmenter(Segmenter):
         chunks = en_postproc(chunks)
         yield from chunks
 
-    def __call__(self, text):
-        parts = self.split(text)
+    def parts(self, text, pos=0, endpos=None):
+        atoms = self.split.atoms(text, pos, endpos)
+        # one snapshot for the whole document, reload does not affect it
+        snapshot = self.dictionaries.snapshot
+        words_dict = snapshot.words_dict
+        abbrevs_dict = snapshot.abbrevs_dict
+        if words_dict.batched or abbrevs_dict.batched:
+            # prefetch needs the whole document, otherwise atoms stream
+            atoms = list(atoms)
+            words, abbrevs = dictionary_candidates(atoms)
+            if words_dict.batched:
+                words_dict = prefetch_dictionary(words_dict, words)
+            if abbrevs_dict.batched:
+                abbrevs_dict = prefetch_dictionary(abbrevs_dict, abbrevs)
+        return self.split.splits(text, atoms, words_dict, abbrevs_dict)
+
+    def __call__(self, text, workers=None, executor=None, unit=None):
+        # with workers or executor huge text is cut in shards, see
+        # razdel.pool.parallel_tokenize. unit is "utf-8" or "utf-16" for
+        # offsets in encoded text
+        if workers is None and executor is None:
+            tokens = self.scan(text)
+        else:
+            from razdel.pool import parallel_tokenize
+            tokens = parallel_tokenize(self, text, workers, executor)
+        return unit_offsets(tokens, text, unit)
+
+    def scan(self, text, pos=0, endpos=None):
+        # tokens of text[pos:endpos], offsets are in text
+        parts = self.parts(text, pos, endpos)
         chunks = self.segment(parts)
         chunks = self.post(chunks)
 
-        offset = 0
+        offset = pos
         for token_text, atom_type in chunks:
             start = text.find(token_text, offset)
             stop = start + len(token_text)
             yield Token(start, stop, token_text, token_type_from_atom(atom_type))
             offset = stop
 
+    def spans(self, text):
+        # (start, stop, type) tuples, no Token and TokenType objects, see
+        # razdel.arrow
+        parts = self.parts(text)
+        chunks = self.post(self.segment(parts))
+
+        offset = 0
+        unknown = int(TokenType.UNK)
+        for token_text, atom_type in chunks:
+            start = text.find(token_text, offset)
+            offset = start + len(token_text)
+            yield start, offset, TOKEN_TYPES.get(atom_type, unknown)
 
     @property
     def debug(self):
-        return DebugTokenSegmenter()
+        return DebugTokenSegmenter(
+            self.split, self.rules,
+            dictionaries=self.dictionaries,
+            observer=self.observer, sample=self.sample
+        )
+
+    @property
+    def profiling(self):
+        return ProfilingTokenSegmenter(
+            self.split, self.rules,
+            dictionaries=self.dictionaries,
+            observer=self.observer, sample=self.sample
+        )
 
 
 class DebugTokenSegmenter(TokenSegmenter, DebugSegmenter):
     pass
 
 
+class ProfilingTokenSegmenter(ProfilingSegmenter, TokenSegmenter):
+    pass
+
+
 tokenize = TokenSegmenter()
@@ -0,0 +1,344 @@
+
+import os
+import sys
+import json
+import queue
+import struct
+import argparse
+import threading
+import socketserver
+from time import monotonic
+from concurrent.futures import (
+    Future,
+    TimeoutError as FutureTimeout
+)
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer
+)
+
+from razdel.spans import (
+    unpack_spans,
+    little_endian
+)
+from razdel.pool import (
+    SPANS,
+    EXECUTORS,
+    segment_spans_batch
+)
+
+
+BATCH_SIZE = 64
+BATCH_WAIT = 0.002
+LATENCIES = 10000
+REQUEST_TIMEOUT = 30
+
+
+########
+#
+#   STATS
+#
+#######
+
+
+def percentile(values, share):
+    # nearest rank, None for no values
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * share))
+    return values[index]
+
+
+class Stats:
+    def __init__(self):
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.latencies = deque(maxlen=LATENCIES)
+        self.lock = threading.Lock()
+
+    def as_json(self, queue_depth):
+        with self.lock:
+            latencies = list(self.latencies)
+            record = {
+                'requests': self.requests,
+                'texts': self.texts,
+                'batches': self.batches,
+                'errors': self.errors,
+                'in_flight': self.in_flight,
+                'queue_depth': queue_depth,
+            }
+        for name, share in [('p50', 0.5), ('p95', 0.95), ('p99', 0.99)]:
+            value = percentile(latencies, share)
+            record[name + '_ms'] = None if value is None else value * 1000
+        return record
+
+
+########
+#
+#   BATCH
+#
+#######
+
+
+class Request:
+    __slots__ = ['segment', 'texts', 'future', 'start']
+
+    def __init__(self, segment, texts):
+        self.segment = segment
+        self.texts = texts
+        self.future = Future()
+        self.start = monotonic()
+
+
+class Batcher:
+    # Concurrent requests wait up to batch_wait for company, then go to the
+    # executor as one task per segmenter. Workers get a list of texts and
+    # return span buffers, no Token objects cross the boundary
+
+    def __init__(self, executor, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT):
+        self.executor = executor
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue = queue.Queue()
+        self.stats = Stats()
+        self.thread = threading.Thread(
+            target=self.loop,
+            name='razdel-batcher',
+            daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, segment, texts):
+        if segment not in SPANS:
+            raise ValueError(segment)
+        request = Request(segment, texts)
+        with self.stats.lock:
+            self.stats.requests += 1
+            self.stats.texts += len(texts)
+        self.queue.put(request)
+        return request.future
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def collect(self, request):
+        batch = [request]
+        size = len(request.texts)
+        deadline = monotonic() + self.batch_wait
+        while size < self.batch_size:
+            timeout = deadline - monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                # let loop see the stop marker
+                self.queue.put(None)
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def loop(self):
+        while True:
+            request = self.queue.get()
+            if request is None:
+                return
+            batch = self.collect(request)
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.segment, []).append(request)
+            for segment, requests in groups.items():
+                self.dispatch(segment, requests)
+
+    def dispatch(self, segment, requests):
+        texts = [text for request in requests for text in request.texts]
+        with self.stats.lock:
+            self.stats.batches += 1
+            self.stats.in_flight += len(texts)
+
+        def fail(error):
+            with self.stats.lock:
+                self.stats.errors += len(requests)
+            for request in requests:
+                request.future.set_exception(error)
+
+        try:
+            # broken process pool or shut down executor, requests get the
+            # error, loop keeps running
+            future = self.executor.submit(segment_spans_batch, segment, texts)
+        except Exception as error:
+            with self.stats.lock:
+                self.stats.in_flight -= len(texts)
+            return fail(error)
+
+        def done(future):
+            with self.stats.lock:
+                self.stats.in_flight -= len(texts)
+            try:
+                buffers = future.result()
+            except Exception as error:
+                return fail(error)
+
+            now = monotonic()
+            offset = 0
+            with self.stats.lock:
+                for request in requests:
+                    self.stats.latencies.append(now - request.start)
+            for request in requests:
+                size = len(request.texts)
+                request.future.set_result(buffers[offset:offset + size])
+                offset += size
+
+        future.add_done_callback(done)
+
+
+########
+#
+#   HTTP
+#
+######
+
+
+def format_binary(buffers):
+    # uint32 count, then per text uint32 size in bytes and span buffer, all
+    # little endian
+    parts = [struct.pack('<I', len(buffers))]
+    for buffer in buffers:
+        parts.append(struct.pack('<I', len(buffer)))
+        parts.append(little_endian(buffer))
+    return b''.join(parts)
+
+
+def format_json(buffers, single):
+    spans = [
+        [list(_) for _ in unpack_spans(buffer)]
+        for buffer in buffers
+    ]
+    if single:
+        spans = spans[0]
+    return json.dumps({'spans': spans}, separators=(',', ':')).encode('utf8')
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    verbose = False
+
+    def address_string(self):
+        # unix socket clients have no (host, port)
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return 'unix'
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def reply(self, status, body, type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def error(self, status, message):
+        body = json.dumps({'error': message}).encode('utf8')
+        self.reply(status, body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/stats':
+            return self.error(404, 'not found')
+        batcher = self.server.batcher
+        record = batcher.stats.as_json(batcher.queue.qsize())
+        self.reply(200, json.dumps(record).encode('utf8'))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        segment = url.path.strip('/')
+        if segment not in SPANS:
+            return self.error(404, 'not found')
+
+        try:
+            size = int(self.headers.get('Content-Length', 0))
+            if size < 0:
+                raise ValueError
+            data = json.loads(self.rfile.read(size))
+            single = 'text' in data
+            texts = [data['text']] if single else data['texts']
+            if not isinstance(texts, list) or not all(isinstance(_, str) for _ in texts):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            return self.error(400, 'expected {"text": str} or {"texts": [str]}')
+
+        future = self.server.batcher.submit(segment, texts)
+        try:
+            buffers = future.result(timeout=self.server.request_timeout)
+        except FutureTimeout:
+            return self.error(503, 'timed out')
+        except Exception as error:
+            return self.error(500, repr(error))
+
+        format = parse_qs(url.query).get('format', ['json'])[0]
+        if format == 'binary':
+            self.reply(200, format_binary(buffers), 'application/octet-stream')
+        else:
+            self.reply(200, format_json(buffers, single))
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(address, batcher, request_timeout=REQUEST_TIMEOUT):
+    # address is (host, port) or path of unix socket
+    if isinstance(address, str):
+        server = UnixHTTPServer(address, Handler)
+    else:
+        server = ThreadingHTTPServer(address, Handler)
+    server.batcher = batcher
+    server.request_timeout = request_timeout
+    return server
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='razdel-serve')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8118)
+    parser.add_argument('--unix', help='listen on unix socket instead of tcp')
+    parser.add_argument('--executor', choices=EXECUTORS, default='processes')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--batch-wait', type=float, default=BATCH_WAIT)
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(args)
+
+    Handler.verbose = args.verbose
+    address = args.unix or (args.host, args.port)
+    with EXECUTORS[args.executor](args.workers) as executor:
+        batcher = Batcher(executor, args.batch_size, args.batch_wait)
+        server = make_server(address, batcher, args.timeout)
+        print('razdel-serve on', address, file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            batcher.close()
+            if args.unix:
+                os.unlink(args.unix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+
+import os
+import json
+import pickle
+import zlib
+from functools import lru_cache
+
+from razdel.record import Record
+
+
+# Snapshot of segmenter state for fast worker start: dictionaries and en
+# lookup tables. Set dictionaries are compiled to mmap files next to the
+# snapshot and pickled by path, worker maps them instead of reading and
+# hashing every word. Compiled regexes can not be serialized, they are
+# compiled on load, ~3ms.
+#
+# File is one json header line, then pickle. Header is checked before
+# unpickling, pickle of other razdel code is never loaded. Fingerprint is
+# hash of modules that define rules and pickled classes, it stands for
+# razdel version: importlib.metadata alone takes ~60ms to import
+
+SNAPSHOT_MAGIC = 'razdel-snapshot'
+SNAPSHOT_FORMAT = 3
+HEADER_SIZE = 1024
+
+RULE_MODULES = [
+    'razdel.record',
+    'razdel.rule',
+    'razdel.split',
+    'razdel.substring',
+    'razdel.snapshot',
+    'razdel.segmenters.base',
+    'razdel.segmenters.dictionaries',
+    'razdel.segmenters.punct',
+    'razdel.segmenters.sokr',
+    'razdel.segmenters.common_tokenize',
+    'razdel.segmenters.en_support',
+    'razdel.segmenters.tokenize',
+    'razdel.segmenters.sentenize',
+]
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=1)
+def rule_fingerprint():
+    from importlib import import_module
+
+    # crc32 is enough to tell code apart, hashlib import costs ~2ms
+    crc = 0
+    for name in RULE_MODULES:
+        module = import_module(name)
+        with open(module.__file__, 'rb') as file:
+            crc = zlib.crc32(file.read(), crc)
+    return '%08x' % crc
+
+
+class Snapshot(Record):
+    __attributes__ = [
+        'magic', 'format', 'fingerprint',
+        'words_dict', 'abbrevs_dict',
+        'special_en_tokens', 'special_en_prefixes'
+    ]
+
+    def __init__(self, magic, format, fingerprint,
+                 words_dict, abbrevs_dict,
+                 special_en_tokens, special_en_prefixes):
+        self.magic = magic
+        self.format = format
+        self.fingerprint = fingerprint
+        self.words_dict = words_dict
+        self.abbrevs_dict = abbrevs_dict
+        self.special_en_tokens = special_en_tokens
+        self.special_en_prefixes = special_en_prefixes
+
+
+def uncached(words_dict):
+    # cache contents are not worth saving, it is rebuilt from traffic
+    from razdel.segmenters.dictionaries import CachedWordDictionary
+
+    if type(words_dict) is CachedWordDictionary:
+        return words_dict.words_dict
+    return words_dict
+
+
+def build_snapshot():
+    from razdel.segmenters import en_support
+    from razdel.segmenters.common_tokenize import (
+        get_words_dictionary,
+        get_abbrevs_dictionary
+    )
+
+    return Snapshot(
+        SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, rule_fingerprint(),
+        uncached(get_words_dictionary()),
+        uncached(get_abbrevs_dictionary()),
+        en_support._get_special_en_tokens(),
+        en_support._get_specian_en_prefixes()
+    )
+
+
+def snapshot_header(snapshot):
+    return {
+        'magic': snapshot.magic,
+        'format': snapshot.format,
+        'fingerprint': snapshot.fingerprint,
+    }
+
+
+def compact_dictionary(words_dict, path):
+    # set is compiled to mmap file, others are pickled as is, mmap and
+    # sqlite ones by path
+    from razdel.segmenters.dictionaries import (
+        SetWordDictionary,
+        MmapWordDictionary,
+        compile_words_dictionary
+    )
+
+    if type(words_dict) is not SetWordDictionary:
+        return words_dict
+    path = os.path.abspath(path)
+    compile_words_dictionary(words_dict.words, path)
+    return MmapWordDictionary(path)
+
+
+def save_snapshot(path, snapshot=None):
+    # set dictionaries go to path.words and path.abbrevs, snapshot refers
+    # to them by absolute path
+    if snapshot is None:
+        snapshot = build_snapshot()
+    snapshot.words_dict = compact_dictionary(snapshot.words_dict, path + '.words')
+    snapshot.abbrevs_dict = compact_dictionary(snapshot.abbrevs_dict, path + '.abbrevs')
+    header = json.dumps(snapshot_header(snapshot))
+    temp = path + '.tmp'
+    with open(temp, 'wb') as file:
+        file.write(header.encode('utf8') + b'\n')
+        pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp, path)
+    return snapshot
+
+
+def read_header(file):
+    line = file.readline(HEADER_SIZE)
+    if not line.endswith(b'\n'):
+        raise SnapshotError('not a razdel snapshot')
+    try:
+        header = json.loads(line)
+    except ValueError:
+        raise SnapshotError('not a razdel snapshot')
+    if not isinstance(header, dict) or header.get('magic') != SNAPSHOT_MAGIC:
+        raise SnapshotError('not a razdel snapshot')
+    return header
+
+
+def check_header(header):
+    format = header.get('format')
+    if format != SNAPSHOT_FORMAT:
+        raise SnapshotError('snapshot format %r, expected %r' % (
+            format, SNAPSHOT_FORMAT
+        ))
+    if header.get('fingerprint') != rule_fingerprint():
+        raise SnapshotError('razdel code changed since snapshot was made')
+
+
+def install_snapshot(snapshot):
+    from razdel import tokenize, sentenize
+    from razdel.segmenters import en_support
+    from razdel.segmenters.common_tokenize import (
+        init_words_dictionary,
+        init_abbrevs_dictionary
+    )
+
+    en_support._SPECIAL_EN_TOKENS = snapshot.special_en_tokens
+    en_support._SPECIAL_EN_PREFIXES = snapshot.special_en_prefixes
+    init_words_dictionary(snapshot.words_dict)
+    init_abbrevs_dictionary(snapshot.abbrevs_dict)
+    # compile scanners now, not on first request
+    tokenize.split.re
+    sentenize.split.re
+
+
+def load_snapshot(path, install=True):
+    with open(path, 'rb') as file:
+        header = read_header(file)
+        check_header(header)
+        try:
+            snapshot = pickle.load(file)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError,
+                OSError, ValueError) as error:
+            # missing or broken dictionary files too
+            raise SnapshotError('broken snapshot: %s' % error)
+    if not isinstance(snapshot, Snapshot) or snapshot_header(snapshot) != header:
+        raise SnapshotError('snapshot does not match its header')
+    if install:
+        install_snapshot(snapshot)
+    return snapshot
@@ -0,0 +1,48 @@
+
+import sys
+from array import array
+
+
+# Compact span buffer: flat int32 triples start, stop, type. Type is
+# TokenType for tokens and -1 for substrings without one, like sentences.
+# Bytes are cheap to pickle and to pass between interpreters and processes
+
+SPAN_TYPE = 'i'
+SPAN_SIZE = 3
+NO_TYPE = -1
+
+
+def pack_spans(substrings):
+    spans = array(SPAN_TYPE)
+    for substring in substrings:
+        spans.extend((
+            substring.start,
+            substring.stop,
+            getattr(substring, 'token_type', NO_TYPE)
+        ))
+    return spans.tobytes()
+
+
+def little_endian(buffer):
+    # span buffers are in native byte order, wire formats fix one
+    if sys.byteorder == 'little':
+        return buffer
+    spans = array(SPAN_TYPE)
+    spans.frombytes(buffer)
+    spans.byteswap()
+    return spans.tobytes()
+
+
+def unpack_spans(buffer):
+    spans = array(SPAN_TYPE)
+    spans.frombytes(buffer)
+    for index in range(0, len(spans), SPAN_SIZE):
+        yield spans[index], spans[index + 1], spans[index + 2]
+
+
+def list_spans(substrings):
+    # same triples as plain lists, for json
+    return [
+        [_.start, _.stop, getattr(_, 'token_type', NO_TYPE)]
+        for _ in substrings
+    ]
@@ -11,10 +11,83 @@ class Substring(Record):
         self.text = text
 
 
-def find_substrings(chunks, text):
-    offset = 0
+def find_substrings(chunks, text, offset=0):
     for chunk in chunks:
         start = text.find(chunk, offset)
         stop = start + len(chunk)
         yield Substring(start, stop, chunk)
         offset = stop
+
+
+# Offsets in code units of encoded text, for callers in other languages.
+# Substrings go in order and do not overlap, size of gaps and substrings is
+# added to running offset, ascii text needs no conversion
+
+
+def utf8_size(text):
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-8', 'surrogatepass'))
+
+
+def utf16_size(text):
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-16-le', 'surrogatepass')) // 2
+
+
+UNITS = {
+    'utf-8': utf8_size,
+    'utf-16': utf16_size,
+}
+
+
+def shift_offsets(substrings, text, size):
+    position = 0
+    offset = 0
+    for substring in substrings:
+        offset += size(text[position:substring.start])
+        start = offset
+        offset += size(substring.text)
+        position = substring.stop
+        substring.start = start
+        substring.stop = offset
+        yield substring
+
+
+def shift_spans(spans, text, size):
+    position = 0
+    offset = 0
+    for start, stop, type in spans:
+        offset += size(text[position:start])
+        shifted = offset
+        offset += size(text[start:stop])
+        position = stop
+        yield shifted, offset, type
+
+
+def unit_size(text, unit):
+    # size function of unit, None if offsets stay as is
+    if unit is None:
+        return
+    if unit not in UNITS:
+        raise ValueError('unit should be one of %s' % ', '.join(UNITS))
+    if text.isascii():
+        return
+    return UNITS[unit]
+
+
+def unit_offsets(substrings, text, unit):
+    # unit is None for code points, "utf-8" or "utf-16"
+    size = unit_size(text, unit)
+    if size is None:
+        return substrings
+    return shift_offsets(substrings, text, size)
+
+
+def unit_spans(spans, text, unit):
+    # same for (start, stop, type) tuples of segmenter spans method
+    size = unit_size(text, unit)
+    if size is None:
+        return spans
+    return shift_spans(spans, text, size)
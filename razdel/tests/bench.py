@@ -0,0 +1,113 @@
+
+import os
+import sys
+import resource
+import subprocess
+import tracemalloc
+from time import perf_counter
+
+
+def rss():
+    # current resident set size in bytes, /proc is linux only, elsewhere
+    # fall back to peak rss
+    try:
+        with open('/proc/self/statm') as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return peak_rss()
+
+
+def uss():
+    # unique set size, pages private to this process, after fork grows as
+    # shared pages are written to. Linux only, None elsewhere
+    try:
+        with open('/proc/self/smaps_rollup') as file:
+            lines = file.read().splitlines()
+    except OSError:
+        return None
+    size = 0
+    for line in lines:
+        if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+            size += int(line.split()[1]) * 1024
+    return size
+
+
+def peak_rss():
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def traced_peak(function, *args):
+    # peak bytes of python allocations during the call, unlike ru_maxrss
+    # does not keep peak of earlier calls. Native allocations are not seen
+    tracemalloc.start()
+    try:
+        function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def percentile(values, share):
+    # nearest rank, None for no values
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * share))
+    return values[index]
+
+
+def timeit(function, *args):
+    start = perf_counter()
+    result = function(*args)
+    return perf_counter() - start, result
+
+
+def mean_ns(function, items, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        for item in items:
+            function(*item)
+        duration = perf_counter() - start
+        if best is None or duration < best:
+            best = duration
+    return best / max(len(items), 1) * 10 ** 9
+
+
+def latencies(function, items):
+    # seconds per item, items are arg tuples
+    durations = []
+    for item in items:
+        start = perf_counter()
+        function(*item)
+        durations.append(perf_counter() - start)
+    return durations
+
+
+def import_times(statement='import razdel'):
+    # fresh interpreter with -X importtime, yields module, depth in import
+    # tree, self and cumulative seconds
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.PIPE,
+        check=True,
+        text=True
+    )
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        yield name.strip(), depth, int(own) / 10 ** 6, int(cumulative) / 10 ** 6
+
+
+def import_seconds(statement='import razdel'):
+    # top level modules, nested ones are in their cumulative time
+    return sum(
+        cumulative
+        for _, depth, _, cumulative in import_times(statement)
+        if depth == 0
+    )
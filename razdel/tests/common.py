@@ -2,6 +2,8 @@
 import os
 from random import seed, sample
 
+from .partition import parse_partitions
+
 
 def run(segment, test):
     guess = list(segment(test.text))
@@ -27,3 +29,10 @@ def data_lines(path, size):
     lines = load_lines(path)
     seed(1)
     return sample(list(lines), size)
+
+
+def data_texts(filename, size=None):
+    # texts of partitions in data file, size samples lines
+    path = data_path(filename)
+    lines = load_lines(path) if size is None else data_lines(path, size)
+    return [_.text for _ in parse_partitions(lines)]
@@ -2,7 +2,15 @@ import pytest
 
 pytest.register_assert_rewrite("razdel.tests.common")
 
+def is_substrings(value):
+    return isinstance(value, list) and all(hasattr(_, 'text') for _ in value)
+
+
 def pytest_assertrepr_compare(op, left, right):
+    # other operands get default pytest report
+    if not is_substrings(left) or not is_substrings(right):
+        return None
+
     # add one more line for "assert ..."
     return (
         ['']
@@ -15,6 +23,8 @@ def pytest_assertrepr_compare(op, left, right):
 
 def pytest_addoption(parser):
     parser.addoption('--int', type=int)
+    parser.addoption('--perf', action='store_true', help='run performance tests')
+    parser.addoption('--perf-update', action='store_true', help='rewrite performance baseline')
 
 
 def pytest_generate_tests(metafunc):
@@ -24,3 +34,19 @@ def pytest_generate_tests(metafunc):
         if count:
             tests = metafunc.module.int_tests(count)
         metafunc.parametrize('int_test', tests)
+
+
+@pytest.fixture
+def restore_words_dict():
+    from razdel.segmenters.common_tokenize import (
+        init_words_dictionary,
+        get_words_dictionary,
+        init_abbrevs_dictionary,
+        get_abbrevs_dictionary
+    )
+
+    words_dict = get_words_dictionary()
+    abbrevs_dict = get_abbrevs_dictionary()
+    yield
+    init_words_dictionary(words_dict, cache_size=0)
+    init_abbrevs_dictionary(abbrevs_dict, cache_size=0)
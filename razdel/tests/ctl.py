@@ -1,18 +1,56 @@
 
+import os
 import sys
+import json
 import argparse
+import platform
+import tempfile
+from itertools import islice
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from random import seed, sample as sample_
 
 from razdel import (
     sentenize,
     tokenize
 )
+from razdel.pool import (
+    SPANS,
+    EXECUTORS,
+    map_spans
+)
+from razdel.worker import (
+    FRAMINGS,
+    serve
+)
+from razdel.snapshot import save_snapshot
+from razdel.segmenters.common_tokenize import init_words_dictionary
+from razdel.segmenters.sokr import SOKRS, PAIR_SOKRS
+from razdel.segmenters.dictionaries import (
+    DefAbbrsWordDictionary,
+    SetWordDictionary,
+    MmapWordDictionary,
+    SqliteWordTable,
+    SqliteWordDictionary,
+    compile_words_dictionary,
+    compile_sqlite_dictionary
+)
 
 from .partition import (
     parse_partitions,
     format_partitions,
     update_partitions
 )
+from .bench import (
+    rss,
+    import_times,
+    import_seconds,
+    traced_peak,
+    percentile,
+    timeit,
+    mean_ns,
+    latencies
+)
 from .gen import (
     generate_partition_precision_tests,
     generate_partition_recall_tests
@@ -115,21 +153,308 @@ def diff_(tests, segment, show):
 
 
 def diff(args):
-    segment = ZOO[args.segment]
-    lines = stdin_lines()
-    partitions = parse_partitions(lines)
-    tests = diff_(partitions, segment, args.show)
-    lines = format_partitions(tests)
+    if args.workers > 1 and not args.show:
+        lines = parallel_lines(diff_chunk, args)
+    else:
+        segment = ZOO[args.segment]
+        lines = stdin_lines()
+        partitions = parse_partitions(lines)
+        tests = diff_(partitions, segment, args.show)
+        lines = format_partitions(tests)
     stdout_lines(lines)
 
 
 def up(args):
-    segment = ZOO[args.segment]
-    lines = stdin_lines()
+    if args.workers > 1:
+        lines = parallel_lines(up_chunk, args)
+    else:
+        segment = ZOO[args.segment]
+        lines = stdin_lines()
+        partitions = parse_partitions(lines)
+        partitions = update_partitions(partitions, segment)
+        lines = format_partitions(partitions)
+    stdout_lines(lines)
+
+
+########
+#
+#   PARALLEL
+#
+######
+
+
+WORKER_SEGMENT = None
+
+
+def init_worker(name):
+    # once per process, heavy zoo imports and models load here, not on
+    # every chunk
+    global WORKER_SEGMENT
+    WORKER_SEGMENT = ZOO[name]
+    list(WORKER_SEGMENT('Т.е. что-то. Да.'))
+
+
+def diff_chunk(lines):
+    partitions = parse_partitions(lines)
+    tests = diff_(partitions, WORKER_SEGMENT, show=False)
+    return list(format_partitions(tests))
+
+
+def up_chunk(lines):
     partitions = parse_partitions(lines)
-    partitions = update_partitions(partitions, segment)
-    lines = format_partitions(partitions)
+    partitions = update_partitions(partitions, WORKER_SEGMENT)
+    return list(format_partitions(partitions))
+
+
+def chunk_lines(lines, size):
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            break
+        yield chunk
+
+
+def parallel_map(function, chunks, workers, name, window=None):
+    # At most window chunks are in flight, stdin is read only as fast as
+    # results are written. Results come in input order
+    window = window or workers * 2
+    with ProcessPoolExecutor(
+            workers,
+            initializer=init_worker,
+            initargs=(name,)
+    ) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(function, chunk))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def parallel_lines(function, args):
+    chunks = chunk_lines(stdin_lines(), args.chunk_size)
+    return parallel_map(function, chunks, args.workers, args.segment)
+
+
+def compile_dict(args):
+    words = (_.strip() for _ in stdin_lines())
+    words = (_ for _ in words if _)
+    compile_words_dictionary(words, args.path)
+
+
+def dict_queries(words, size):
+    seed(1)
+    hits = sample_(words, min(size, len(words)))
+    misses = [_ + '~' for _ in hits]
+    return [(_, 'ru') for _ in hits + misses]
+
+
+def abbrevs_words():
+    pairs = {' '.join(_) for _ in PAIR_SOKRS}
+    return sorted(SOKRS | pairs)
+
+
+def lookup_many_ns(words_dict, queries, repeat=3):
+    words = [word for word, _ in queries]
+    ns = mean_ns(words_dict.lookup_many, [(words, 'ru')], repeat)
+    return ns / max(len(words), 1)
+
+
+def bench_dict_(words, dir, abbrevs):
+    path = os.path.join(dir, 'words.bin')
+    compile_words_dictionary(words, path)
+    db = os.path.join(dir, 'words.db')
+    compile_sqlite_dictionary(words, db)
+    queries = dict_queries(words, 10000)
+
+    # file backed go first, freed python objects are not always returned
+    # to os
+    backends = [
+        ('mmap', lambda: MmapWordDictionary(path), False),
+        ('sqlite', lambda: SqliteWordDictionary(db, cache_size=0), False),
+        ('sqlite+lru', lambda: SqliteWordDictionary(db), False),
+        ('sqlite batch', lambda: SqliteWordTable(db), True),
+        ('set', lambda: SetWordDictionary(words), False),
+    ]
+    if abbrevs:
+        backends.append(('abbrevs', DefAbbrsWordDictionary, False))
+
+    for name, load, batch in backends:
+        before = rss()
+        seconds, words_dict = timeit(load)
+        if batch:
+            ns = lookup_many_ns(words_dict, queries)
+        else:
+            ns = mean_ns(words_dict.is_word_known, queries)
+        after = rss()
+        yield name, seconds, ns, after - before
+        del words_dict
+
+
+def bench_dict(args):
+    if args.abbrevs:
+        words = abbrevs_words()
+    else:
+        words = [_.strip() for _ in stdin_lines()]
+        words = [_ for _ in words if _]
+    with tempfile.TemporaryDirectory() as dir:
+        records = bench_dict_(words, dir, args.abbrevs)
+        lines = (
+            '{}\tload {:.1f}ms\tlookup {:.0f}ns\trss {:+.1f}MB'.format(
+                name, seconds * 1000, ns, size / 2 ** 20
+            )
+            for name, seconds, ns, size in records
+        )
+        stdout_lines(lines)
+
+
+def gil_enabled():
+    check = getattr(sys, '_is_gil_enabled', None)
+    if check:
+        return check()
+    return True
+
+
+def run_spans(segment, texts, executor, chunksize):
+    return list(map_spans(segment, texts, executor, chunksize))
+
+
+def bench_scaling_(segment, texts, workers, executor):
+    size = sum(len(_) for _ in texts)
+    base = None
+    for count in workers:
+        with EXECUTORS[executor](count) as pool:
+            # start workers before the clock
+            run_spans(segment, texts[:count], pool, 1)
+            chunksize = max(1, len(texts) // (count * 16))
+            seconds, _ = timeit(run_spans, segment, texts, pool, chunksize)
+        if base is None:
+            base = seconds
+        yield count, seconds, size / seconds, base / seconds
+
+
+def bench_scaling(args):
+    texts = list(stdin_lines())
+    workers = [int(_) for _ in args.workers.split(',')]
+    print('{}, gil {}, cpus {}'.format(
+        args.executor,
+        'enabled' if gil_enabled() else 'disabled',
+        os.cpu_count()
+    ))
+    records = bench_scaling_(args.segment, texts, workers, args.executor)
+    lines = (
+        'workers {}\t{:.2f}s\t{:.0f} chars/s\tx{:.2f}'.format(*record)
+        for record in records
+    )
+    stdout_lines(lines)
+
+
+def count_substrings(segment, text):
+    return sum(1 for _ in segment(text))
+
+
+def bench_segment(segment, texts, warmup):
+    # Warm-up is first documents on cold segmenter: lazy tables, imports,
+    # models. Steady state is then whole corpus
+    items = [(segment, _) for _ in texts]
+    durations = latencies(count_substrings, items[:warmup])
+    record = {
+        'warmup': {
+            'docs': len(durations),
+            'seconds': sum(durations),
+            'docs_per_s': len(durations) / max(sum(durations), 1e-9),
+        }
+    }
+
+    before = rss()
+    durations = latencies(count_substrings, items)
+    seconds = sum(durations)
+    tokens = sum(count_substrings(segment, _) for _ in texts)
+    chars = sum(len(_) for _ in texts)
+    durations.sort()
+    record.update({
+        'docs': len(texts),
+        'chars': chars,
+        'tokens': tokens,
+        'seconds': seconds,
+        'docs_per_s': len(texts) / seconds,
+        'chars_per_s': chars / seconds,
+        'tokens_per_s': tokens / seconds,
+        'p50_ms': percentile(durations, 0.5) * 1000,
+        'p95_ms': percentile(durations, 0.95) * 1000,
+        'p99_ms': percentile(durations, 0.99) * 1000,
+        'rss_delta_mb': (rss() - before) / 2 ** 20,
+        # separate pass, tracing slows segmenter down
+        'peak_traced_mb': traced_peak(latencies, count_substrings, items) / 2 ** 20,
+    })
+    return record
+
+
+def bench_(names, texts, warmup):
+    for name in names:
+        record = {
+            'segment': name,
+            'python': platform.python_version(),
+            'gil': gil_enabled(),
+        }
+        try:
+            record.update(bench_segment(ZOO[name], texts, warmup))
+        except ImportError as error:
+            record['skipped'] = str(error)
+        yield record
+
+
+def bench(args):
+    texts = list(stdin_lines())
+    if args.partitions:
+        texts = [_.text for _ in parse_partitions(texts)]
+    if not texts:
+        raise SystemExit('empty corpus')
+    names = args.segments or ['sentenize', 'tokenize']
+    for name in names:
+        if name not in ZOO:
+            raise SystemExit('unknown segment %r, choose from %s' % (name, ', '.join(ZOO)))
+    records = bench_(names, texts, args.warmup)
+    lines = (json.dumps(_) for _ in records)
+    stdout_lines(lines)
+
+
+def profile(args):
+    segment = {'tokenize': tokenize, 'sentenize': sentenize}[args.segment]
+    segment = segment.profiling
+    for text in stdin_lines():
+        for _ in segment(text):
+            pass
+    stdout_lines(segment.profile.report())
+
+
+def bench_import(args):
+    rows = sorted(import_times(args.statement), key=lambda _: -_[2])
+    lines = (
+        '{:<40} self {:6.1f}ms\tcumulative {:6.1f}ms'.format(
+            '  ' * depth + name, own * 1000, cumulative * 1000
+        )
+        for name, depth, own, cumulative in rows[:args.top]
+    )
     stdout_lines(lines)
+    print('total {:.1f}ms, interpreter startup {:.1f}ms'.format(
+        import_seconds(args.statement) * 1000,
+        import_seconds('pass') * 1000
+    ))
+
+
+def snapshot(args):
+    if args.words:
+        with open(args.words) as file:
+            words = [_.strip() for _ in file]
+        init_words_dictionary(SetWordDictionary(_ for _ in words if _))
+    save_snapshot(args.path)
+
+
+def worker(args):
+    serve(sys.stdin.buffer, sys.stdout.buffer, args.framing)
 
 
 def main():
@@ -152,10 +477,52 @@ def main():
     sub.set_defaults(function=diff)
     sub.add_argument('segment', choices=ZOO)
     sub.add_argument('--show', action='store_true')
+    sub.add_argument('--workers', type=int, default=1, help='ignored with --show')
+    sub.add_argument('--chunk-size', type=int, default=1000)
 
     sub = subs.add_parser('up')
     sub.set_defaults(function=up)
     sub.add_argument('segment', choices=ZOO)
+    sub.add_argument('--workers', type=int, default=1)
+    sub.add_argument('--chunk-size', type=int, default=1000)
+
+    sub = subs.add_parser('compile-dict')
+    sub.set_defaults(function=compile_dict)
+    sub.add_argument('path')
+
+    sub = subs.add_parser('bench-dict')
+    sub.set_defaults(function=bench_dict)
+    sub.add_argument('--abbrevs', action='store_true')
+
+    sub = subs.add_parser('bench-scaling')
+    sub.set_defaults(function=bench_scaling)
+    sub.add_argument('segment', choices=SPANS)
+    sub.add_argument('--workers', default='1,2,4,8')
+    sub.add_argument('--executor', choices=EXECUTORS, default='threads')
+
+    sub = subs.add_parser('bench')
+    sub.set_defaults(function=bench)
+    sub.add_argument('segments', nargs='*', metavar='segment', help='default sentenize tokenize')
+    sub.add_argument('--warmup', type=int, default=100)
+    sub.add_argument('--partitions', action='store_true', help='stdin is razdel-ctl partitions')
+
+    sub = subs.add_parser('profile')
+    sub.set_defaults(function=profile)
+    sub.add_argument('segment', choices=['tokenize', 'sentenize'])
+
+    sub = subs.add_parser('bench-import')
+    sub.set_defaults(function=bench_import)
+    sub.add_argument('statement', nargs='?', default='from razdel import tokenize, sentenize')
+    sub.add_argument('--top', type=int, default=20)
+
+    sub = subs.add_parser('snapshot')
+    sub.set_defaults(function=snapshot)
+    sub.add_argument('path')
+    sub.add_argument('--words', help='words dictionary, one per line')
+
+    sub = subs.add_parser('worker')
+    sub.set_defaults(function=worker)
+    sub.add_argument('--framing', choices=FRAMINGS, default='ndjson')
 
     args = sys.argv[1:]
     args = parser.parse_args(args)
@@ -0,0 +1,67 @@
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from razdel import (
+    tokenize,
+    sentenize
+)
+from razdel.aio import (
+    atokenize,
+    asentenize,
+    atokenize_iter,
+    abatch
+)
+
+
+TEXT = 'И т. д. и т. п. В общем, вся газета. Кружка-термос на 0.5л (50/64 см³, 516;...)'
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_atokenize():
+    assert run(atokenize(TEXT)) == list(tokenize(TEXT))
+
+
+def test_asentenize_executor():
+    with ThreadPoolExecutor(1) as executor:
+        guess = run(asentenize(TEXT, executor))
+    assert guess == list(sentenize(TEXT))
+
+
+def test_atokenize_iter_yields_control():
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(len(ticks))
+            await asyncio.sleep(0)
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        tokens = [_ async for _ in atokenize_iter(TEXT * 10, slice_size=10)]
+        task.cancel()
+        return tokens
+
+    assert run(main()) == list(tokenize(TEXT * 10))
+    assert len(ticks) > 10
+
+
+def test_abatch_bounded():
+    texts = [TEXT, TEXT[:20], ''] * 5
+    active = []
+
+    class Segment:
+        def segment_list(self, text):
+            active.append(text)
+            try:
+                assert len(active) <= 2
+                return tokenize.segment_list(text)
+            finally:
+                active.remove(text)
+
+    with ThreadPoolExecutor(8) as executor:
+        guess = run(abatch(Segment(), texts, concurrency=2, executor=executor))
+    assert guess == [list(tokenize(_)) for _ in texts]
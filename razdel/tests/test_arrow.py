@@ -0,0 +1,61 @@
+
+import sys
+
+import pytest
+
+from razdel import (
+    tokenize,
+    sentenize
+)
+from razdel.arrow import (
+    tokenize_array,
+    sentenize_array
+)
+from razdel.spans import list_spans
+
+
+@pytest.fixture
+def pa():
+    return pytest.importorskip('pyarrow')
+
+
+TEXTS = ['Кружка-термос на 0.5л', None, '', 'Привет. Пока!']
+
+
+def etalon(segment, texts):
+    return [
+        None if _ is None
+        else [
+            dict(zip(['start', 'stop', 'type'], span))
+            for span in list_spans(segment(_))
+        ]
+        for _ in texts
+    ]
+
+
+def test_tokenize_array(pa):
+    spans = tokenize_array(pa.array(TEXTS))
+    assert spans.type == pa.list_(pa.struct([
+        ('start', pa.int32()),
+        ('stop', pa.int32()),
+        ('type', pa.int32()),
+    ]))
+    assert spans.to_pylist() == etalon(tokenize, TEXTS)
+
+
+def test_sentenize_chunked(pa):
+    strings = pa.chunked_array([TEXTS[:2], TEXTS[2:]], type=pa.large_string())
+    spans = sentenize_array(strings)
+    assert spans.num_chunks == 2
+    assert spans.to_pylist() == etalon(sentenize, TEXTS)
+
+
+def test_slice(pa):
+    strings = pa.array(TEXTS).slice(3)
+    assert tokenize_array(strings).to_pylist() == etalon(tokenize, TEXTS[3:])
+
+
+def test_no_pyarrow(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    with pytest.raises(ImportError):
+        tokenize_array(TEXTS)
@@ -0,0 +1,32 @@
+
+import sys
+import json
+import subprocess
+
+
+TEXTS = 'Привет. Пока!\nКружка-термос на 0.5л\n'
+
+
+def ctl(*args):
+    return subprocess.run(
+        [sys.executable, '-m', 'razdel.tests.ctl'] + list(args),
+        input=TEXTS,
+        capture_output=True,
+        text=True
+    )
+
+
+def test_bench():
+    process = ctl('bench', '--warmup', '1')
+    assert process.returncode == 0, process.stderr
+    records = [json.loads(_) for _ in process.stdout.splitlines()]
+    assert [_['segment'] for _ in records] == ['sentenize', 'tokenize']
+    assert records[1]['docs'] == 2
+    assert records[1]['p50_ms'] <= records[1]['p99_ms']
+    assert records[1]['peak_traced_mb'] > 0
+
+
+def test_bench_unknown_segment():
+    process = ctl('bench', 'lemmatize')
+    assert process.returncode != 0
+    assert 'unknown segment' in process.stderr
@@ -0,0 +1,342 @@
+
+import sys
+import pickle
+import struct
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from razdel import tokenize
+from razdel.segmenters.tokenize import TokenSegmenter
+from razdel.segmenters.common_tokenize import (
+    init_words_dictionary,
+    get_words_dictionary,
+    init_abbrevs_dictionary,
+    get_abbrevs_dictionary
+)
+from razdel.segmenters.dictionaries import (
+    BaseWordDictionary,
+    DefAbbrsWordDictionary,
+    SetWordDictionary,
+    MmapWordDictionary,
+    CachedWordDictionary,
+    DictionaryHolder,
+    SqliteWordDictionary,
+    compile_words_dictionary,
+    compile_sqlite_dictionary,
+    offsets_table
+)
+
+from .common import data_texts
+
+
+WORDS = ['что-то', 'премьер-министром', 'state-of-', '-the-art', 'ёж-ёж', 'a']
+
+
+@pytest.fixture
+def mmap_dict(tmp_path):
+    path = str(tmp_path / 'words.bin')
+    compile_words_dictionary(WORDS, path)
+    words_dict = MmapWordDictionary(path)
+    yield words_dict
+    words_dict.close()
+
+
+@pytest.mark.parametrize('word', WORDS)
+def test_mmap_known(mmap_dict, word):
+    assert mmap_dict.is_word_known(word, 'ru')
+
+
+@pytest.mark.parametrize('word', ['', 'что', 'что-то-', 'Что-то', 'b', 'яя'])
+def test_mmap_unknown(mmap_dict, word):
+    assert not mmap_dict.is_word_known(word, 'ru')
+
+
+def test_mmap_same_as_set(mmap_dict):
+    assert sorted(mmap_dict) == sorted(SetWordDictionary(WORDS).words)
+
+
+def test_mmap_pickle(mmap_dict):
+    words_dict = pickle.loads(pickle.dumps(mmap_dict))
+    assert words_dict.is_word_known('что-то', 'ru')
+    words_dict.close()
+
+
+@pytest.mark.skipif(sys.byteorder != 'little', reason='swap path is native there')
+def test_offsets_byteswap():
+    # swapped copy, one item per 4 bytes of table, not per byte
+    view = memoryview(struct.pack('<3I', 0, 3, 70000))
+    offsets = offsets_table(view, 'big')
+    assert list(offsets) == list(struct.unpack('>3I', view))
+
+
+def test_mmap_empty(tmp_path):
+    path = str(tmp_path / 'empty.bin')
+    compile_words_dictionary([], path)
+    words_dict = MmapWordDictionary(path)
+    assert len(words_dict) == 0
+    assert not words_dict.is_word_known('что-то', 'ru')
+    words_dict.close()
+
+
+def test_mmap_bad_file(tmp_path):
+    path = tmp_path / 'words.txt'
+    path.write_bytes(b'not a dictionary')
+    with pytest.raises(ValueError):
+        MmapWordDictionary(str(path))
+
+
+@pytest.mark.parametrize('size', [4, 12, 20, -1])
+def test_mmap_truncated(tmp_path, size):
+    path = tmp_path / 'words.bin'
+    compile_words_dictionary(WORDS, str(path))
+    data = path.read_bytes()
+    path.write_bytes(data[:size])
+    with pytest.raises(ValueError):
+        MmapWordDictionary(str(path))
+
+
+def test_mmap_many(tmp_path):
+    words = ['слово-%d' % _ for _ in range(1000)]
+    path = str(tmp_path / 'many.bin')
+    compile_words_dictionary(words, path)
+    words_dict = MmapWordDictionary(path)
+    assert all(words_dict.is_word_known(_, 'ru') for _ in words)
+    assert not any(words_dict.is_word_known(_ + '~', 'ru') for _ in words[:100])
+    words_dict.close()
+
+
+class CountingDict(BaseWordDictionary):
+    def __init__(self, words) -> None:
+        self.words = set(words)
+        self.calls = []
+
+    def is_word_known(self, word, lang):
+        self.calls.append((word, lang))
+        return word in self.words
+
+
+def test_cache_stats():
+    words_dict = CountingDict(['что-то'])
+    cached = CachedWordDictionary(words_dict, size=2)
+    assert cached.is_word_known('что-то', 'ru')
+    assert cached.is_word_known('что-то', 'ru')
+    assert not cached.is_word_known('как-то', 'ru')
+    assert not cached.is_word_known('как-то', 'ru')
+    assert cached.is_word_known('что-то', 'en')
+    assert words_dict.calls == [('что-то', 'ru'), ('как-то', 'ru'), ('что-то', 'en')]
+    assert (cached.hits, cached.misses) == (2, 3)
+    assert cached.hit_rate == 0.4
+
+
+def test_cache_evicts_least_recent():
+    words_dict = CountingDict([])
+    cached = CachedWordDictionary(words_dict, size=2)
+    for word in ['a', 'b', 'a', 'c', 'a', 'b']:
+        cached.is_word_known(word, 'en')
+    assert [_ for _, lang in words_dict.calls] == ['a', 'b', 'c', 'b']
+
+
+def test_init_cache_opt_out(restore_words_dict):
+    words_dict = CountingDict([])
+    init_words_dictionary(words_dict)
+    assert isinstance(get_words_dictionary(), CachedWordDictionary)
+    init_words_dictionary(words_dict, cache_size=0)
+    assert get_words_dictionary() is words_dict
+
+
+class StrictBatchedDict(BaseWordDictionary):
+    batched = True
+
+    def __init__(self, words_dict) -> None:
+        self.words_dict = words_dict
+        self.batches = 0
+
+    def is_word_known(self, word, lang):
+        raise AssertionError('%r is not prefetched' % word)
+
+    def lookup_many(self, words, lang):
+        self.batches += 1
+        return {_ for _ in words if self.words_dict.is_word_known(_, lang)}
+
+
+def test_prefetch_covers_rules(restore_words_dict):
+    words_dict = SetWordDictionary([
+        'что-то', 'премьер-министром', 'state-of-', '-of-the-', '-the-art'
+    ])
+    texts = data_texts('tokens.txt') + [
+        'что-то, премьер-министром state-of-the-art',
+        'т.д. и т. п. к.т.н. p.m. 8 a.m. стр. 5',
+    ]
+
+    init_words_dictionary(words_dict, cache_size=0)
+    init_abbrevs_dictionary(DefAbbrsWordDictionary(), cache_size=0)
+    etalon = [list(tokenize(_)) for _ in texts]
+
+    batched_words = StrictBatchedDict(words_dict)
+    batched_abbrevs = StrictBatchedDict(DefAbbrsWordDictionary())
+    init_words_dictionary(batched_words)
+    init_abbrevs_dictionary(batched_abbrevs)
+    guess = [list(tokenize(_)) for _ in texts]
+
+    assert guess == etalon
+    assert batched_words.batches > 0
+    assert batched_abbrevs.batches > 0
+
+
+@pytest.fixture
+def sqlite_dict(tmp_path):
+    path = str(tmp_path / 'words.db')
+    compile_sqlite_dictionary(WORDS, path)
+    words_dict = SqliteWordDictionary(path)
+    yield words_dict
+    words_dict.close()
+
+
+def test_sqlite_lookup(sqlite_dict):
+    assert sqlite_dict.is_word_known('что-то', 'ru')
+    assert not sqlite_dict.is_word_known('как-то', 'ru')
+    assert sqlite_dict.is_word_known('что-то', 'ru')
+    assert sqlite_dict.hits == 1
+
+
+def test_sqlite_lookup_many(sqlite_dict):
+    words = WORDS + ['как-то-%d' % _ for _ in range(600)]
+    assert sqlite_dict.lookup_many(words, 'ru') == set(WORDS)
+    assert sqlite_dict.lookup_many(words[:3], 'ru') == set(WORDS[:3])
+    assert sqlite_dict.hits == 3
+
+
+def test_sqlite_threads(sqlite_dict):
+    with ThreadPoolExecutor(4) as executor:
+        known = list(executor.map(
+            lambda _: sqlite_dict.words_dict.is_word_known('что-то', 'ru'),
+            range(100)
+        ))
+    assert all(known)
+
+
+def test_sqlite_read_only(sqlite_dict):
+    with pytest.raises(sqlite3.OperationalError):
+        sqlite_dict.words_dict.connection.execute('DELETE FROM words')
+
+
+def test_sqlite_lang_column(tmp_path):
+    path = str(tmp_path / 'langs.db')
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute('CREATE TABLE lexicon (text TEXT, lang TEXT)')
+        connection.executemany('INSERT INTO lexicon VALUES (?, ?)', [
+            ('e-mail', 'en'),
+            ('из-за', 'ru'),
+        ])
+    connection.close()
+
+    words_dict = SqliteWordDictionary(path, 'lexicon', 'text', 'lang')
+    assert words_dict.is_word_known('e-mail', 'en')
+    assert not words_dict.is_word_known('e-mail', 'ru')
+    assert words_dict.lookup_many(['e-mail', 'из-за'], 'ru') == {'из-за'}
+    words_dict = pickle.loads(pickle.dumps(words_dict))
+    assert words_dict.is_word_known('из-за', 'ru')
+    words_dict.close()
+
+
+def test_segmenter_dictionaries():
+    ru = TokenSegmenter(words_dict=SetWordDictionary(['что-то']))
+    en = TokenSegmenter(
+        words_dict=SetWordDictionary(['state-of-', '-of-the-', '-the-art']),
+        abbrevs_dict=SetWordDictionary([])
+    )
+    texts = ['что-то', 'state-of-the-art', 'стр.'] * 50
+
+    def run(segment, text):
+        return [_.text for _ in segment(text)]
+
+    with ThreadPoolExecutor(4) as executor:
+        guess = list(executor.map(run, [ru] * len(texts) + [en] * len(texts), texts * 2))
+
+    etalon = [['что-то'], ['state', '-', 'of', '-', 'the', '-', 'art'], ['стр.']] * 50
+    etalon += [['что', '-', 'то'], ['state-of-the-art'], ['стр', '.']] * 50
+    assert guess == etalon
+
+
+def test_segmenter_dictionaries_cached():
+    words_dict = SetWordDictionary(['что-то'])
+    snapshot = TokenSegmenter(words_dict=words_dict).dictionaries.snapshot
+    assert isinstance(snapshot.words_dict, CachedWordDictionary)
+    assert snapshot.words_dict.words_dict is words_dict
+    segment = TokenSegmenter(words_dict=words_dict, cache_size=0)
+    assert segment.dictionaries.snapshot.words_dict is words_dict
+
+
+def test_segmenter_dictionary_attributes():
+    words_dict = SetWordDictionary(['что-то'])
+    segment = TokenSegmenter(words_dict=words_dict)
+    assert segment.words_dict.words_dict is words_dict
+    assert isinstance(segment.abbrevs_dict, CachedWordDictionary)
+
+    segment.words_dict = SetWordDictionary([])
+    assert [_.text for _ in segment('что-то')] == ['что', '-', 'то']
+    segment.abbrevs_dict = SetWordDictionary(['стр'])
+    assert [_.text for _ in segment('стр.')] == ['стр.']
+
+
+def test_swap_keeps_running_document():
+    dictionaries = DictionaryHolder(SetWordDictionary(['что-то']))
+    segment = TokenSegmenter(dictionaries=dictionaries)
+    assert dictionaries.version == 1
+
+    tokens = segment('что-то и что-то')
+    first = next(tokens)
+    snapshot = dictionaries.swap(words_dict=SetWordDictionary([]))
+    assert snapshot.version == 2
+    assert [first.text] + [_.text for _ in tokens] == ['что-то', 'и', 'что-то']
+    assert [_.text for _ in segment('что-то')] == ['что', '-', 'то']
+
+
+def test_init_none_resets(restore_words_dict):
+    def texts(text):
+        return [_.text for _ in tokenize(text)]
+
+    init_words_dictionary(SetWordDictionary(['что-то']))
+    init_abbrevs_dictionary(SetWordDictionary([]))
+    assert texts('что-то т.е.') == ['что-то', 'т', '.', 'е', '.']
+
+    init_words_dictionary(None)
+    assert texts('что-то т.е.') == ['что', '-', 'то', 'т', '.', 'е', '.']
+    init_abbrevs_dictionary(None)
+    assert texts('что-то т.е.') == ['что', '-', 'то', 'т.', 'е.']
+    assert isinstance(get_abbrevs_dictionary(), DefAbbrsWordDictionary)
+
+
+def test_swap_keeps_other():
+    dictionaries = DictionaryHolder(SetWordDictionary(['что-то']))
+    words_dict = dictionaries.snapshot.words_dict
+    dictionaries.swap(abbrevs_dict=SetWordDictionary([]))
+    assert dictionaries.snapshot.words_dict is words_dict
+
+
+def test_reload():
+    dictionaries = DictionaryHolder()
+    segment = TokenSegmenter(dictionaries=dictionaries)
+    assert [_.text for _ in segment('что-то')] == ['что', '-', 'то']
+
+    future = dictionaries.reload(
+        lambda: (SetWordDictionary(['что-то']), DefAbbrsWordDictionary())
+    )
+    snapshot = future.result(timeout=10)
+    assert snapshot.version == 2
+    assert isinstance(snapshot.words_dict, CachedWordDictionary)
+    assert [_.text for _ in segment('что-то')] == ['что-то']
+
+
+def test_reload_error():
+    dictionaries = DictionaryHolder()
+
+    def loader():
+        raise IOError('no lexicon')
+
+    with pytest.raises(IOError):
+        dictionaries.reload(loader).result(timeout=10)
+    assert dictionaries.version == 1
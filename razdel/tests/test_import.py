@@ -0,0 +1,99 @@
+
+import sys
+import subprocess
+
+import pytest
+
+from .bench import import_seconds
+
+
+def imported(statement):
+    script = (
+        'import sys\n'
+        + statement + '\n'
+        + 'print("\\n".join(sys.modules))'
+    )
+    process = subprocess.run(
+        [sys.executable, '-c', script],
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True
+    )
+    return set(process.stdout.splitlines())
+
+
+# import of both segmenters, interpreter startup is subtracted. Best of
+# REPEAT runs, so noise of busy CI does not fail it
+IMPORT_BUDGET = 0.05
+REPEAT = 5
+
+HEAVY = {
+    'sqlite3',
+    'mmap',
+    'urllib.request',
+    'concurrent.futures',
+}
+
+
+def test_import_razdel():
+    modules = imported('import razdel')
+    assert not modules & HEAVY
+    assert 'razdel.segmenters' not in modules
+
+
+def test_import_sentenize():
+    modules = imported('from razdel import sentenize')
+    assert 'razdel.segmenters.sentenize' in modules
+    assert 'razdel.segmenters.tokenize' not in modules
+    assert 'razdel.segmenters.dictionaries' not in modules
+
+
+def test_import_tokenize():
+    modules = imported('from razdel import tokenize; list(tokenize("т.е. что-то"))')
+    assert not modules & HEAVY
+
+
+@pytest.mark.parametrize('name', ['tokenize', 'sentenize'])
+def test_lazy_attributes(name):
+    import razdel
+    import razdel.segmenters
+
+    segment = getattr(razdel, name)
+    assert getattr(razdel.segmenters, name) is segment
+    assert callable(segment)
+    with pytest.raises(AttributeError):
+        razdel.lemmatize
+
+
+def test_import_budget():
+    statement = 'from razdel import tokenize, sentenize'
+    seconds = min(import_seconds(statement) for _ in range(REPEAT))
+    startup = min(import_seconds('pass') for _ in range(REPEAT))
+    assert seconds - startup < IMPORT_BUDGET
+
+
+@pytest.mark.parametrize('statement', [
+    'from razdel.segmenters import tokenize',
+    'from razdel.segmenters.tokenize import TokenSegmenter\n'
+    'from razdel.segmenters import tokenize',
+    'import razdel.segmenters.tokenize\n'
+    'from razdel.segmenters import tokenize',
+    'from razdel.segmenters.tokenize import TokenSegmenter\n'
+    'from razdel import tokenize',
+])
+def test_import_order(statement):
+    script = statement + '\nprint(type(tokenize).__name__)'
+    process = subprocess.run(
+        [sys.executable, '-c', script],
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True
+    )
+    assert process.stdout.strip() == 'TokenSegmenter'
+
+
+def test_atom_cached():
+    from razdel.segmenters import common_tokenize
+
+    assert common_tokenize.ATOM is common_tokenize.ATOM
+    assert 'ATOM' in vars(common_tokenize)
@@ -0,0 +1,129 @@
+
+from random import Random
+
+import pytest
+
+from razdel import (
+    tokenize,
+    sentenize
+)
+from razdel.incremental import (
+    IncrementalTokenizer,
+    IncrementalSentenizer
+)
+
+from .common import data_texts
+
+
+PIECES = [
+    'a', 'ab', 'я', '1.5', '.', ',', '!', '-', ':', "'", '«', '»',
+    ' ', '  ', '\n', 'т.е.', 'с.', "don't", 'com', 'ru',
+    'http://ex.ru/x', 'doi:', ' doi: 10.1000/x ',
+]
+
+
+def spans(tokens):
+    return [(_.start, _.stop, _.text, _.token_type) for _ in tokens]
+
+
+SENT_PIECES = [
+    'Слово', 'слово', ' ', '  ', '\n', '\n\n', '.', '!', '?', '...', ';',
+    ':)', '«', '»', '"', '(', ')', '-', '—', '1.', 'II.', 'а)', 'т.', 'е.',
+    'См.', 'А. С.', 'Пушкин',
+]
+
+
+def random_edits(Document, name, pieces, seed, count):
+    random = Random(seed)
+    texts = data_texts(name)
+    text = ' '.join(random.choice(texts) for _ in range(100))
+    document = Document(text)
+    for _ in range(count):
+        size = len(document.text)
+        start = random.randint(0, size)
+        stop = min(size, start + random.choice([0, 0, 1, 2, 5, 20]))
+        insert = ''.join(
+            random.choice(pieces)
+            for _ in range(random.choice([0, 1, 1, 2, 3]))
+        )
+        yield document, start, stop, insert
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_random_edits(seed):
+    edits = random_edits(IncrementalTokenizer, 'tokens.txt', PIECES, seed, 150)
+    for document, start, stop, insert in edits:
+        before = spans(document)
+        change = document.edit(start, stop, insert)
+        guess = spans(document)
+        assert guess == spans(tokenize(document.text))
+
+        delta = len(insert) - (stop - start)
+        after = [
+            (begin + delta, end + delta, text, type)
+            for begin, end, text, type in before[change.old_stop:]
+        ]
+        assert before[:change.start] + guess[change.start:change.stop] + after == guess
+
+
+def test_change_is_local():
+    text = ' '.join(['Слово, слово.'] * 1000)
+    document = IncrementalTokenizer(text)
+    change = document.edit(len(text) // 2, len(text) // 2, 'т.е. ')
+    assert change.stop - change.start < 10
+    assert change.old_stop - change.start < 10
+    assert spans(document) == spans(tokenize(document.text))
+
+
+def test_edges():
+    document = IncrementalTokenizer()
+    assert len(document) == 0
+    document.edit(0, 0, 'Цена 1.5')
+    assert [_.text for _ in document] == ['Цена', '1.5']
+    document.edit(6, 7, ' ')
+    assert [_.text for _ in document] == ['Цена', '1', '5']
+    document.edit(0, len(document.text), '')
+    assert document.tokens == []
+    with pytest.raises(ValueError):
+        document.edit(1, 0, 'x')
+
+
+def sent_spans(sents):
+    return [(_.start, _.stop, _.text) for _ in sents]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_sent_random_edits(seed):
+    edits = random_edits(IncrementalSentenizer, 'sents.txt', SENT_PIECES, seed, 150)
+    for document, start, stop, insert in edits:
+        before = sent_spans(document)
+        change = document.edit(start, stop, insert)
+        guess = sent_spans(document)
+        assert guess == sent_spans(sentenize(document.text))
+
+        delta = len(insert) - (stop - start)
+        after = [
+            (begin + delta, end + delta, text)
+            for begin, end, text in before[change.old_stop:]
+        ]
+        assert before[:change.start] + guess[change.start:change.stop] + after == guess
+
+
+def test_sent_change_is_local():
+    text = ' '.join(['Первое предложение. Второе, т. е. последнее!'] * 1000)
+    document = IncrementalSentenizer(text)
+    change = document.edit(len(text) // 2, len(text) // 2, 'См. ')
+    assert change.stop - change.start < 5
+    assert change.old_stop - change.start < 5
+    assert sent_spans(document) == sent_spans(sentenize(document.text))
+
+
+def test_sent_edges():
+    document = IncrementalSentenizer()
+    assert len(document) == 0
+    document.edit(0, 0, 'Привет. Пока')
+    assert [_.text for _ in document] == ['Привет.', 'Пока']
+    document.edit(6, 7, ',')
+    assert [_.text for _ in document] == ['Привет, Пока']
+    document.edit(0, len(document.text), '  ')
+    assert document.sents == []
@@ -0,0 +1,239 @@
+
+from functools import partial
+from multiprocessing import get_context
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    ProcessPoolExecutor
+)
+
+import pytest
+
+from razdel import (
+    tokenize,
+    sentenize
+)
+from razdel.spans import (
+    NO_TYPE,
+    pack_spans,
+    unpack_spans
+)
+from razdel import pool
+from razdel.pool import (
+    map_spans,
+    process_executor,
+    interpreter_executor,
+    cut_points,
+    is_sent_cut
+)
+from razdel.incremental import is_hard_start
+from razdel.segmenters.tokenize import TokenSegmenter
+from razdel.segmenters.common_tokenize import init_words_dictionary
+from razdel.segmenters.dictionaries import SetWordDictionary
+from razdel.segmenters import en_support
+
+from .partition import (
+    parse_partitions,
+    format_partitions,
+    update_partitions
+)
+from .ctl import (
+    up_chunk,
+    chunk_lines,
+    parallel_map
+)
+from .common import (
+    data_path,
+    data_texts,
+    load_lines
+)
+
+
+TOKENS = data_texts('tokens.txt')
+SENTS = data_texts('sents.txt')
+
+
+def document(texts, size):
+    seps = [' ', '  ', '\n', '', ' doi: 10.1000/x ', '\n\n']
+    return ''.join(
+        texts[_ % len(texts)] + seps[_ % len(seps)]
+        for _ in range(size)
+    )
+
+
+def test_tokenize_batch():
+    etalon = [list(tokenize(_)) for _ in TOKENS]
+    assert tokenize.batch(TOKENS, workers=4) == etalon
+
+
+def test_sentenize_batch():
+    etalon = [list(sentenize(_)) for _ in SENTS]
+    with ThreadPoolExecutor(2) as executor:
+        guess = sentenize.batch(SENTS, executor=executor)
+    assert guess == etalon
+
+
+def test_lazy_tables_race(monkeypatch):
+    monkeypatch.setattr(en_support, '_SPECIAL_EN_TOKENS', None)
+    monkeypatch.setattr(en_support, '_SPECIAL_EN_PREFIXES', None)
+    texts = ["don't", "can't stop", "I'm here"] * 100
+    etalon = [['do', "n't"], ['ca', "n't", 'stop'], ['I', "'m", 'here']] * 100
+    guess = tokenize.batch(texts, workers=8)
+    assert [[_.text for _ in tokens] for tokens in guess] == etalon
+
+
+def spans(substrings):
+    return [
+        (_.start, _.stop, getattr(_, 'token_type', NO_TYPE))
+        for _ in substrings
+    ]
+
+
+def test_pack_spans():
+    tokens = list(tokenize('Кружка-термос на 0.5л (50/64 см³, 516;...)'))
+    assert list(unpack_spans(pack_spans(tokens))) == spans(tokens)
+    assert list(unpack_spans(pack_spans([]))) == []
+
+
+def test_process_spans():
+    with process_executor(2) as executor:
+        guess = list(map_spans('tokenize', TOKENS[:100], executor, chunksize=10))
+    etalon = [spans(tokenize(_)) for _ in TOKENS[:100]]
+    assert [list(unpack_spans(_)) for _ in guess] == etalon
+
+
+def test_interpreter_spans():
+    try:
+        executor = interpreter_executor(2)
+    except RuntimeError:
+        pytest.skip('no sub-interpreters')
+    with executor:
+        guess = list(map_spans('sentenize', SENTS, executor))
+    etalon = [spans(sentenize(_)) for _ in SENTS]
+    assert [list(unpack_spans(_)) for _ in guess] == etalon
+
+
+def test_ctl_parallel_up():
+    lines = list(load_lines(data_path('tokens.txt')))
+    etalon = list(format_partitions(update_partitions(parse_partitions(lines), tokenize)))
+    chunks = chunk_lines(lines, 7)
+    guess = list(parallel_map(up_chunk, chunks, workers=2, name='tokenize', window=3))
+    assert guess == etalon
+
+
+def test_cut_points():
+    text = document(TOKENS, 200)
+    cuts = cut_points(text, 16)
+    assert cuts[0] == 0 and cuts[-1] == len(text)
+    assert cuts == sorted(set(cuts))
+    assert all(is_hard_start(text, _) for _ in cuts[1:-1])
+    assert cut_points('без_пробелов' * 10, 4) == [0, 120]
+
+
+def test_tokenize_shards(monkeypatch):
+    monkeypatch.setattr(pool, 'SHARD_SIZE', 16)
+    text = document(TOKENS, len(TOKENS) * 2)
+    with ThreadPoolExecutor(4) as executor:
+        guess = list(tokenize(text, executor=executor))
+    assert guess == list(tokenize(text))
+
+
+def test_tokenize_workers(monkeypatch):
+    monkeypatch.setattr(pool, 'SHARD_SIZE', 1024)
+    text = document(TOKENS, 1000)
+    assert list(tokenize(text, workers=2)) == list(tokenize(text))
+
+
+def test_tokenize_custom_shards(monkeypatch):
+    monkeypatch.setattr(pool, 'SHARD_SIZE', 16)
+    segment = TokenSegmenter(words_dict=SetWordDictionary(['что-то']))
+    text = 'что-то и что-то. ' * 100
+    with ThreadPoolExecutor(2) as executor:
+        guess = list(segment(text, executor=executor))
+    assert guess == list(segment(text))
+    with pytest.raises(ValueError):
+        list(segment(text, workers=2))
+
+
+@pytest.fixture
+def spawn(monkeypatch):
+    # fresh workers do not inherit parent state, as with forkserver
+    monkeypatch.setattr(pool, 'process_executor', partial(
+        process_executor,
+        context=get_context('spawn')
+    ))
+
+
+def test_tokenize_workers_dictionaries(monkeypatch, spawn, restore_words_dict):
+    monkeypatch.setattr(pool, 'SHARD_SIZE', 1024)
+    text = 'что-то и что-то. ' * 1000
+    etalon = list(tokenize(text))
+    init_words_dictionary(SetWordDictionary(['что-то']))
+    guess = list(tokenize(text))
+    assert guess != etalon
+    assert list(tokenize(text, workers=2)) == guess
+
+
+def test_tokenize_executor_dictionaries(monkeypatch, restore_words_dict):
+    # user pool and pool made before init have default dictionaries in
+    # workers, shards would differ from serial
+    monkeypatch.setattr(pool, 'SHARD_SIZE', 1024)
+    text = 'что-то и что-то. ' * 1000
+    context = get_context('spawn')
+    with ProcessPoolExecutor(2, mp_context=context) as executor:
+        etalon = list(tokenize(text))
+        assert list(tokenize(text, executor=executor)) == etalon
+
+        init_words_dictionary(SetWordDictionary(['что-то']))
+        with pytest.raises(ValueError):
+            list(tokenize(text, executor=executor))
+
+    with process_executor(2, context) as executor:
+        guess = list(tokenize(text, executor=executor))
+        assert guess == list(tokenize(text)) != etalon
+
+        init_words_dictionary(SetWordDictionary([]))
+        with pytest.raises(ValueError):
+            list(tokenize(text, executor=executor))
+
+
+def test_sentenize_workers_dictionaries(monkeypatch, spawn, restore_words_dict):
+    monkeypatch.setattr(pool, 'SHARD_SIZE', 1024)
+    text = document(SENTS, 500)
+    init_words_dictionary(SetWordDictionary(['что-то']))
+    assert list(sentenize(text, workers=2)) == list(sentenize(text))
+
+
+def test_shard_function_exact_type():
+    class Executor(ThreadPoolExecutor):
+        # like InterpreterPoolExecutor, objects are not shared
+        pass
+
+    segment = TokenSegmenter(words_dict=SetWordDictionary(['что-то']))
+    with Executor(1) as executor:
+        with pytest.raises(ValueError):
+            pool.shard_function(
+                segment, executor, tokenize,
+                pool.scan_shard, pool.tokenize_shard
+            )
+
+
+def test_sent_cuts():
+    assert is_sent_cut(sentenize, 'Первое длинное предложение.\n\nВторое', 27)
+    assert not is_sent_cut(sentenize, 'Первое длинное предложение.\n\nвторое', 27)
+    assert not is_sent_cut(sentenize, '1. Пункт.\n\n2. Пункт', 9)
+    assert not is_sent_cut(sentenize, 'Длинное предложение, т.\n\nд. и т.п.', 23)
+
+
+def test_sentenize_shards(monkeypatch):
+    monkeypatch.setattr(pool, 'SHARD_SIZE', 64)
+    for sep in ['\n', '\n\n', ' \n ']:
+        text = sep.join(SENTS)
+        with ThreadPoolExecutor(4) as executor:
+            guess = list(sentenize(text, executor=executor))
+        assert guess == list(sentenize(text))
+
+
+def test_sentenize_workers(monkeypatch):
+    monkeypatch.setattr(pool, 'SHARD_SIZE', 1024)
+    text = document(SENTS, 2000)
+    assert list(sentenize(text, workers=2)) == list(sentenize(text))
@@ -0,0 +1,125 @@
+
+import re
+import json
+import tracemalloc
+from time import perf_counter
+
+import pytest
+
+from razdel import (
+    tokenize,
+    sentenize
+)
+
+from .common import (
+    data_path,
+    data_texts
+)
+
+
+# Timings are divided by time of calibration workload, so baseline is about
+# the same on fast and slow machines. Suite fails on TOLERANCE x slowdown
+# or allocation growth, ok for noisy CI, 2x regression from new rule is
+# caught. Run with --perf, rewrite baseline with --perf --perf-update
+
+BASELINE = data_path('perf_baseline.json')
+TOLERANCE = 1.5
+REPEAT = 5
+
+
+@pytest.fixture(scope='module')
+def baseline(request):
+    config = request.config
+    if not config.getoption('perf'):
+        pytest.skip('use --perf')
+
+    with open(BASELINE) as file:
+        data = json.load(file)
+    yield data
+
+    if config.getoption('perf_update'):
+        with open(BASELINE, 'w') as file:
+            json.dump(data, file, indent=2, sort_keys=True)
+            file.write('\n')
+
+
+def calibration():
+    text = 'Слово, word 3.14 (и т.д.). ' * 2000
+    count = 0
+    for match in re.finditer(r'\w+|\S', text):
+        count += len(match.group())
+    return count
+
+
+def timed(function, *args):
+    start = perf_counter()
+    function(*args)
+    return perf_counter() - start
+
+
+def normalized(function, *args):
+    # calibration runs next to every measurement, so both see the
+    # same machine load, best of REPEAT ratios
+    return min(
+        timed(function, *args) / timed(calibration)
+        for _ in range(REPEAT)
+    )
+
+
+def check(baseline, request, name, value):
+    if request.config.getoption('perf_update'):
+        baseline[name] = value
+        return
+    etalon = baseline[name]
+    if value > etalon * TOLERANCE:
+        pytest.fail('{}: {:.4f} vs baseline {:.4f}, tolerance {}x'.format(
+            name, value, etalon, TOLERANCE
+        ))
+
+
+SHORT = {
+    'tokenize': data_texts('tokens.txt', 500),
+    'sentenize': data_texts('sents.txt', 10),
+}
+LONG = {
+    name: ' '.join(texts * (20000 // sum(len(_) for _ in texts) + 1))
+    for name, texts in SHORT.items()
+}
+SEGMENTS = {
+    'tokenize': tokenize,
+    'sentenize': sentenize,
+}
+
+
+def segment_all(segment, texts):
+    for text in texts:
+        for _ in segment(text):
+            pass
+
+
+@pytest.mark.parametrize('name', SEGMENTS)
+def test_short_latency(baseline, request, name):
+    texts = SHORT[name]
+    value = normalized(segment_all, SEGMENTS[name], texts) / len(texts)
+    check(baseline, request, name + '_short', value)
+
+
+@pytest.mark.parametrize('name', SEGMENTS)
+def test_long_throughput(baseline, request, name):
+    value = normalized(segment_all, SEGMENTS[name], [LONG[name]])
+    check(baseline, request, name + '_long', value)
+
+
+@pytest.mark.parametrize('name', SEGMENTS)
+def test_allocations(baseline, request, name):
+    # peak of traced memory while streaming long document, in bytes per
+    # char. Does not depend on machine speed, not normalized
+    text = LONG[name]
+    segment_all(SEGMENTS[name], [text])
+    tracemalloc.start()
+    try:
+        segment_all(SEGMENTS[name], [text])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    check(baseline, request, name + '_peak_bytes_per_char', peak / len(text))
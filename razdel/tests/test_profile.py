@@ -0,0 +1,107 @@
+
+from razdel import (
+    tokenize,
+    sentenize
+)
+from razdel.rule import JOIN, SPLIT
+from razdel.segmenters.tokenize import (
+    TokenSegmenter,
+    ProfilingTokenSegmenter
+)
+from razdel.segmenters.sentenize import (
+    SentSegmenter,
+    ProfilingSentSegmenter
+)
+
+from .common import data_texts
+
+
+def test_profile_tokenize():
+    segment = tokenize.profiling
+    assert isinstance(segment, ProfilingTokenSegmenter)
+    items = data_texts('tokens.txt')
+    guess = [list(segment(_)) for _ in items]
+    assert guess == [list(tokenize(_)) for _ in items]
+
+    profile = segment.profile
+    assert profile.docs == len(items)
+    atoms = [len(list(tokenize.split.atoms(_))) for _ in items]
+    assert profile.splits == sum(max(_ - 1, 0) for _ in atoms)
+    assert 0 < profile.ruled < profile.splits
+    assert [_.name for _ in profile.rules][:2] == ['ru_hyphen_complex_cases', 'ru_adj_hyphen']
+    for stats in profile.rules:
+        assert stats.joins + stats.splits == stats.verdicts <= stats.calls
+    # every split ends with one verdict or falls through all rules
+    verdicts = sum(_.verdicts for _ in profile.rules)
+    assert verdicts <= profile.ruled
+    assert profile.rules[0].calls == profile.ruled
+    assert profile.rules_per_split >= 1
+
+
+def test_profile_sentenize():
+    segment = sentenize.profiling
+    assert isinstance(segment, ProfilingSentSegmenter)
+    for text in data_texts('sents.txt'):
+        list(segment(text))
+    profile = segment.profile
+    assert profile.docs == 10
+    assert profile.splits == profile.ruled > 0
+    assert profile.rules[0].name == 'empty_side'
+    lines = list(profile.report())
+    assert lines[0].startswith('docs 10, splits %d' % profile.splits)
+    assert len(lines) == 2 + len(profile.rules)
+
+
+def test_observer():
+    decisions = []
+    segment = TokenSegmenter(observer=lambda *args: decisions.append(args))
+    assert [_.text for _ in segment('т.е. 1.5')] == ['т.', 'е.', '1.5']
+    assert [(split.left, name, action) for split, name, action in decisions] == [
+        ('т', 'abbrevs', JOIN),
+        ('.', None, SPLIT),
+        ('е', 'abbrevs', JOIN),
+        ('1', 'float', JOIN),
+        ('.', 'float', JOIN),
+    ]
+
+
+def test_observer_default_split():
+    decisions = []
+    segment = SentSegmenter(observer=lambda *args: decisions.append(args))
+    list(segment('Да. Нет'))
+    assert [(name, action) for _, name, action in decisions] == [(None, SPLIT)]
+
+
+def test_observer_sample():
+    decisions = []
+    segment = SentSegmenter(observer=lambda *args: decisions.append(args), sample=3)
+    for index in range(9):
+        list(segment('Документ %d. Да.' % index))
+    assert [split.left for split, name, _ in decisions if not name] == [
+        'Документ 0', 'Документ 3', 'Документ 6'
+    ]
+
+
+def test_no_observer_path():
+    assert 'segment' not in vars(tokenize)
+    assert 'segment' in vars(TokenSegmenter(observer=print))
+
+
+def test_observer_profiling():
+    decisions = []
+    segment = TokenSegmenter(observer=lambda *args: decisions.append(args))
+    segment = segment.profiling
+    list(segment('т.е. 1.5'))
+    profile = segment.profile
+    assert len(decisions) == profile.ruled == 5
+    assert sum(_.verdicts for _ in profile.rules) == 4
+
+
+def test_observer_debug(capsys):
+    decisions = []
+    segment = SentSegmenter(observer=lambda *args: decisions.append(args), sample=2)
+    segment = segment.debug
+    assert segment.sample == 2
+    list(segment('Да. Нет'))
+    assert [(name, action) for _, name, action in decisions] == [(None, SPLIT)]
+    assert "'Да' | '.' | ' Нет'" in capsys.readouterr().out
@@ -0,0 +1,174 @@
+
+import json
+import socket
+import struct
+import threading
+from http.client import HTTPConnection
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor
+)
+
+import pytest
+
+from razdel import tokenize, sentenize
+from razdel.spans import unpack_spans
+from razdel.serve import Batcher, make_server
+
+
+TEXT = 'Кружка-термос на 0.5л (50/64 см³, 516;...). Она стоит 3 руб.'
+
+
+class UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path):
+        super().__init__('localhost')
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+@pytest.fixture
+def batcher():
+    with ThreadPoolExecutor(2) as executor:
+        batcher = Batcher(executor, batch_wait=0.01)
+        yield batcher
+        batcher.close()
+
+
+def start(address, batcher, **kwargs):
+    server = make_server(address, batcher, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def server(batcher):
+    server = start(('127.0.0.1', 0), batcher)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def connect(server):
+    host, port = server.server_address
+    return HTTPConnection(host, port)
+
+
+def post(connection, path, data):
+    connection.request('POST', path, json.dumps(data))
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def etalon(segment, text):
+    return [
+        [_.start, _.stop, -1 if segment is sentenize else 0]
+        for _ in segment(text)
+    ]
+
+
+def test_tokenize(server):
+    status, body = post(connect(server), '/tokenize', {'text': TEXT})
+    assert status == 200
+    spans = json.loads(body)['spans']
+    assert [(start, stop) for start, stop, _ in spans] == [
+        (_.start, _.stop) for _ in tokenize(TEXT)
+    ]
+
+
+def test_sentenize_texts(server):
+    status, body = post(connect(server), '/sentenize', {'texts': [TEXT, '']})
+    assert status == 200
+    assert json.loads(body)['spans'] == [etalon(sentenize, TEXT), []]
+
+
+def test_binary(server):
+    connection = connect(server)
+    connection.request('POST', '/sentenize?format=binary', json.dumps({'texts': [TEXT]}))
+    body = connection.getresponse().read()
+    count, size = struct.unpack_from('<II', body)
+    assert count == 1
+    assert [list(_) for _ in unpack_spans(body[8:8 + size])] == etalon(sentenize, TEXT)
+
+
+def test_bad_request(server):
+    connection = connect(server)
+    assert post(connection, '/tokenize', {'text': 1})[0] == 400
+    assert post(connection, '/tokenize', {'texts': 'abc'})[0] == 400
+    assert post(connection, '/lemmatize', {'text': TEXT})[0] == 404
+
+    connection = connect(server)
+    connection.putrequest('POST', '/tokenize')
+    connection.putheader('Content-Length', 'abc')
+    connection.endheaders()
+    assert connection.getresponse().status == 400
+
+
+def test_concurrent_batches(server, batcher):
+    texts = ['%d. %s' % (_, TEXT) for _ in range(32)]
+
+    def run(text):
+        return json.loads(post(connect(server), '/tokenize', {'text': text})[1])['spans']
+
+    with ThreadPoolExecutor(8) as executor:
+        guess = list(executor.map(run, texts))
+    assert [len(_) for _ in guess] == [len(list(tokenize(_))) for _ in texts]
+
+    connection = connect(server)
+    connection.request('GET', '/stats')
+    stats = json.loads(connection.getresponse().read())
+    assert stats['requests'] == stats['texts'] == 32
+    assert stats['batches'] < 32
+    assert stats['queue_depth'] == stats['in_flight'] == 0
+    assert stats['p50_ms'] <= stats['p99_ms']
+
+
+def test_unix_socket(tmp_path, batcher):
+    path = str(tmp_path / 'razdel.sock')
+    server = start(path, batcher)
+    try:
+        status, body = post(UnixHTTPConnection(path), '/sentenize', {'text': TEXT})
+        assert status == 200
+        assert json.loads(body)['spans'] == etalon(sentenize, TEXT)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class BrokenExecutor:
+    def submit(self, *args):
+        raise RuntimeError('cannot schedule new futures after shutdown')
+
+
+class StuckExecutor:
+    def submit(self, *args):
+        return Future()
+
+
+def test_broken_executor():
+    batcher = Batcher(BrokenExecutor(), batch_wait=0)
+    server = start(('127.0.0.1', 0), batcher)
+    try:
+        for _ in range(2):
+            assert post(connect(server), '/tokenize', {'text': TEXT})[0] == 500
+        assert batcher.thread.is_alive()
+        assert batcher.stats.errors == 2
+        assert batcher.stats.in_flight == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+        batcher.close()
+
+
+def test_timeout():
+    batcher = Batcher(StuckExecutor(), batch_wait=0)
+    server = start(('127.0.0.1', 0), batcher, request_timeout=0.1)
+    try:
+        assert post(connect(server), '/tokenize', {'text': TEXT})[0] == 503
+    finally:
+        server.shutdown()
+        server.server_close()
+        batcher.close()
@@ -0,0 +1,131 @@
+
+import sys
+import json
+import pickle
+import subprocess
+
+import pytest
+
+from razdel import tokenize
+from razdel.snapshot import (
+    RULE_MODULES,
+    SnapshotError,
+    snapshot_header,
+    build_snapshot,
+    save_snapshot,
+    load_snapshot
+)
+from razdel.segmenters import en_support
+from razdel.segmenters.common_tokenize import (
+    init_words_dictionary,
+    get_words_dictionary
+)
+from razdel.segmenters.dictionaries import (
+    SetWordDictionary,
+    MmapWordDictionary,
+    CachedWordDictionary
+)
+
+
+def texts(segment, text):
+    return [_.text for _ in segment(text)]
+
+
+def test_roundtrip(tmp_path, restore_words_dict):
+    path = str(tmp_path / 'razdel.snapshot')
+    init_words_dictionary(SetWordDictionary(['что-то']))
+    snapshot = save_snapshot(path)
+    assert isinstance(snapshot.words_dict, MmapWordDictionary)
+    assert list(snapshot.words_dict) == ['что-то']
+
+    init_words_dictionary(SetWordDictionary([]))
+    en_support._SPECIAL_EN_TOKENS = None
+    assert texts(tokenize, 'что-то') == ['что', '-', 'то']
+
+    load_snapshot(path)
+    assert isinstance(get_words_dictionary(), CachedWordDictionary)
+    assert en_support._SPECIAL_EN_TOKENS is not None
+    assert texts(tokenize, "что-то, don't") == ['что-то', ',', 'do', "n't"]
+
+
+def test_fingerprint_mismatch(tmp_path, restore_words_dict):
+    path = str(tmp_path / 'razdel.snapshot')
+    snapshot = build_snapshot()
+    snapshot.fingerprint = 'other rules'
+    save_snapshot(path, snapshot)
+    with pytest.raises(SnapshotError):
+        load_snapshot(path)
+
+
+def test_format_mismatch(tmp_path, restore_words_dict):
+    path = str(tmp_path / 'razdel.snapshot')
+    snapshot = build_snapshot()
+    snapshot.format = 1
+    save_snapshot(path, snapshot)
+    with pytest.raises(SnapshotError):
+        load_snapshot(path, install=False)
+
+
+def test_broken(tmp_path):
+    path = tmp_path / 'razdel.snapshot'
+    path.write_bytes(b'garbage')
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(path))
+    path.write_bytes(pickle.dumps({'words': []}))
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(path))
+
+
+def test_header_checked_first(tmp_path):
+    # pickle after header with other rules is never loaded
+    path = tmp_path / 'razdel.snapshot'
+    header = snapshot_header(build_snapshot())
+    header['fingerprint'] = 'other rules'
+    path.write_bytes(json.dumps(header).encode('utf8') + b'\nnot a pickle')
+    with pytest.raises(SnapshotError, match='code changed'):
+        load_snapshot(str(path))
+
+
+def test_header_mismatch(tmp_path):
+    path = tmp_path / 'razdel.snapshot'
+    snapshot = build_snapshot()
+    header = snapshot_header(snapshot)
+    snapshot.fingerprint = 'other rules'
+    path.write_bytes(
+        json.dumps(header).encode('utf8') + b'\n'
+        + pickle.dumps(snapshot)
+    )
+    with pytest.raises(SnapshotError, match='header'):
+        load_snapshot(str(path), install=False)
+
+
+def test_fingerprint_modules():
+    for name in ['razdel.rule', 'razdel.split', 'razdel.segmenters.base',
+                 'razdel.segmenters.dictionaries']:
+        assert name in RULE_MODULES
+
+
+def test_missing_dictionary(tmp_path, restore_words_dict):
+    path = str(tmp_path / 'razdel.snapshot')
+    init_words_dictionary(SetWordDictionary(['что-то']))
+    save_snapshot(path)
+    (tmp_path / 'razdel.snapshot.words').unlink()
+    with pytest.raises(SnapshotError):
+        load_snapshot(path, install=False)
+
+
+def test_no_metadata_import():
+    # importlib.metadata costs more than the whole load
+    script = (
+        'import sys\n'
+        'from razdel.snapshot import build_snapshot, check_header, snapshot_header\n'
+        'check_header(snapshot_header(build_snapshot()))\n'
+        'print("importlib.metadata" in sys.modules)'
+    )
+    process = subprocess.run(
+        [sys.executable, '-c', script],
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True
+    )
+    assert process.stdout.strip() == 'False'
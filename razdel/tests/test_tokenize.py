@@ -2,7 +2,7 @@
 import pytest
 
 from razdel import tokenize as tokenize_orig
-from razdel.segmenters.common_tokenize import BaseWordDictionary, init_words_dictionary
+from razdel.segmenters.common_tokenize import BaseWordDictionary, TokenSplitter, init_words_dictionary
 from razdel.substring import Substring
 
 from .partition import parse_partitions
@@ -238,3 +238,10 @@ def int_tests(count):
 
 def test_int(int_test):
     run(tokenize, int_test)
+
+
+def test_uri_trailing_atoms():
+    text = 'see http://ex.ru!, ok'
+    atoms = list(TokenSplitter().atoms(text))
+    assert [(_.start, _.stop) for _ in atoms] == [(0, 3), (4, 16), (16, 17), (17, 18), (19, 21)]
+    assert all(text[_.start:_.stop] == _.text for _ in atoms)
@@ -0,0 +1,58 @@
+
+import pytest
+
+from razdel import (
+    tokenize,
+    sentenize
+)
+from razdel.spans import list_spans
+from razdel.substring import unit_spans
+
+from .common import data_texts
+
+
+TEXTS = [
+    'Кружка-термос на 0.5л (50/64 см³, 516;...)',
+    'Привет 😀! Это 𝔘𝔫𝔦𝔠𝔬𝔡𝔢.  Ёж ест — суп.',
+    'plain ascii text. Second one',
+    '',
+]
+
+
+def encoded(text, substrings, encoding, width):
+    data = text.encode(encoding)
+    return [
+        data[_.start * width:_.stop * width].decode(encoding)
+        for _ in substrings
+    ]
+
+
+@pytest.mark.parametrize('segment', [tokenize, sentenize])
+@pytest.mark.parametrize('text', TEXTS)
+def test_units(segment, text):
+    etalon = [_.text for _ in segment(text)]
+    guess = encoded(text, segment(text, unit='utf-8'), 'utf-8', 1)
+    assert guess == etalon
+    guess = encoded(text, segment(text, unit='utf-16'), 'utf-16-le', 2)
+    assert guess == etalon
+
+
+@pytest.mark.parametrize('segment', [tokenize, sentenize])
+@pytest.mark.parametrize('unit', [None, 'utf-8', 'utf-16'])
+def test_spans(segment, unit):
+    # spans method gives same triples as substrings, without objects
+    texts = TEXTS + data_texts('tokens.txt', 200) + data_texts('sents.txt', 10)
+    for text in texts:
+        guess = list(unit_spans(segment.spans(text), text, unit))
+        etalon = list_spans(segment(text, unit=unit))
+        assert [list(_) for _ in guess] == etalon
+
+
+def test_ascii_same_offsets():
+    text = TEXTS[2]
+    assert list(tokenize(text, unit='utf-8')) == list(tokenize(text))
+
+
+def test_bad_unit():
+    with pytest.raises(ValueError):
+        tokenize('текст', unit='utf-32')
@@ -0,0 +1,66 @@
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+import razdel
+
+from .bench import uss
+
+
+# Fresh interpreter forks a child, child segments texts, prints how much
+# its unique memory grew. Lazy structures built in child are private pages
+SCRIPT = '''
+import os
+import sys
+import gc
+
+import razdel
+from razdel.tests.bench import uss
+
+mode = sys.argv[1]
+if mode != 'cold':
+    razdel.warmup(freeze=mode == 'freeze')
+
+pid = os.fork()
+if not pid:
+    before = uss()
+    text = 'Т.е. что-то, don\\'t. См. http://example.com. «Да», — сказал он.'
+    for _ in range(50):
+        list(razdel.tokenize(text))
+        list(razdel.sentenize(text))
+    gc.collect()
+    print(uss() - before, flush=True)
+    os._exit(0)
+os.waitpid(pid, 0)
+'''
+
+
+def child_uss_growth(mode):
+    process = subprocess.run(
+        [sys.executable, '-c', SCRIPT, mode],
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    )
+    return int(process.stdout)
+
+
+@pytest.mark.skipif(
+    not hasattr(os, 'fork') or uss() is None,
+    reason='needs fork and /proc/self/smaps_rollup'
+)
+def test_warmup_shares_pages():
+    cold = child_uss_growth('cold')
+    warm = child_uss_growth('warm')
+    frozen = child_uss_growth('freeze')
+    assert warm < cold
+    assert frozen < cold
+
+
+def test_warmup():
+    razdel.warmup()
+    assert [_.text for _ in razdel.tokenize("don't")] == ['do', "n't"]
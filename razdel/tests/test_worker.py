@@ -0,0 +1,76 @@
+
+import io
+import sys
+import json
+import subprocess
+
+from razdel import tokenize, sentenize
+from razdel.worker import (
+    LENGTH,
+    serve,
+    write_frame
+)
+
+
+TEXT = 'Кружка-термос на 0.5л.\nОна стоит 3 руб.'
+
+
+def token_spans(text):
+    return [[_.start, _.stop] for _ in tokenize(text)]
+
+
+def run(requests, framing):
+    input = io.BytesIO()
+    for request in requests:
+        data = request if isinstance(request, bytes) else json.dumps(request).encode('utf8')
+        if framing == 'ndjson':
+            input.write(data + b'\n')
+        else:
+            write_frame(input, data)
+    input.seek(0)
+    output = io.BytesIO()
+    serve(input, output, framing)
+    return output.getvalue()
+
+
+def test_ndjson():
+    output = run([
+        {'id': 1, 'segment': 'tokenize', 'text': TEXT},
+        {'id': 2, 'segment': 'sentenize', 'texts': [TEXT, '']},
+        b'{broken',
+        {'id': 4, 'segment': 'lemmatize', 'text': TEXT},
+    ], 'ndjson')
+    first, second, third, fourth = [json.loads(_) for _ in output.splitlines()]
+    assert first['id'] == 1
+    assert [_[:2] for _ in first['spans']] == token_spans(TEXT)
+    assert second['spans'] == [[[_.start, _.stop, -1] for _ in sentenize(TEXT)], []]
+    assert third['id'] is None and 'error' in third
+    assert fourth['id'] == 4 and 'error' in fourth
+
+
+def test_length_frames():
+    output = run([{'id': 'a', 'text': TEXT}], 'length')
+    size, = LENGTH.unpack_from(output)
+    assert len(output) == LENGTH.size + size
+    response = json.loads(output[LENGTH.size:])
+    assert response['id'] == 'a'
+    assert [_[:2] for _ in response['spans']] == token_spans(TEXT)
+
+
+def test_pipelining():
+    # response to first request comes before second is written
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'razdel.tests.ctl', 'worker'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE
+    )
+    try:
+        for id in range(3):
+            process.stdin.write(json.dumps({'id': id, 'text': TEXT}).encode('utf8') + b'\n')
+            process.stdin.flush()
+            response = json.loads(process.stdout.readline())
+            assert response['id'] == id
+        process.stdin.close()
+        assert process.wait(timeout=10) == 0
+    finally:
+        process.kill()
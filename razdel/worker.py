@@ -0,0 +1,97 @@
+
+import json
+import struct
+
+from razdel import (
+    tokenize,
+    sentenize
+)
+from razdel.spans import list_spans
+
+
+# Long running worker for callers that are not python. Requests and
+# responses are json objects:
+#
+#   {"id": 1, "segment": "tokenize", "text": "..."}
+#   {"id": 1, "spans": [[0, 5, 1], ...]}
+#
+#   {"id": 2, "segment": "sentenize", "texts": ["...", "..."]}
+#   {"id": 2, "spans": [[[0, 10, -1]], ...]}
+#
+#   {"id": 3, "error": "..."}
+#
+# Framing is either one object per line (ndjson, newlines inside text are
+# escaped by json) or 4 byte big endian length followed by utf-8 json.
+# Responses go in request order and are flushed one by one, so callers can
+# pipeline: write many requests without waiting for responses
+
+SEGMENTS = {
+    'tokenize': tokenize,
+    'sentenize': sentenize,
+}
+
+LENGTH = struct.Struct('>I')
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def read_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def write_ndjson(stream, data):
+    stream.write(data + b'\n')
+
+
+def read_frames(stream):
+    while True:
+        header = stream.read(LENGTH.size)
+        if not header:
+            return
+        if len(header) < LENGTH.size:
+            raise ProtocolError('truncated frame header')
+        size, = LENGTH.unpack(header)
+        data = stream.read(size)
+        if len(data) < size:
+            raise ProtocolError('truncated frame')
+        yield data
+
+
+def write_frame(stream, data):
+    stream.write(LENGTH.pack(len(data)) + data)
+
+
+FRAMINGS = {
+    'ndjson': (read_ndjson, write_ndjson),
+    'length': (read_frames, write_frame),
+}
+
+
+def handle(data):
+    id = None
+    try:
+        request = json.loads(data)
+        id = request.get('id')
+        segment = SEGMENTS[request.get('segment', 'tokenize')]
+        if 'text' in request:
+            spans = list_spans(segment(request['text']))
+        else:
+            spans = [list_spans(segment(_)) for _ in request['texts']]
+    except Exception as error:
+        return {'id': id, 'error': '{}: {}'.format(type(error).__name__, error)}
+    return {'id': id, 'spans': spans}
+
+
+def serve(input, output, framing='ndjson'):
+    # input, output are binary streams, runs until input is closed
+    read, write = FRAMINGS[framing]
+    for data in read(input):
+        response = handle(data)
+        data = json.dumps(response, ensure_ascii=False, separators=(',', ':'))
+        write(output, data.encode('utf8'))
+        output.flush()
@@ -30,8 +30,12 @@ setup(
     packages=find_packages(),
     entry_points={
         'console_scripts': [
-            'razdel-ctl=razdel.tests.ctl:main'
+            'razdel-ctl=razdel.tests.ctl:main',
+            'razdel-serve=razdel.serve:main'
         ],
     },
-    install_requires=[]
+    install_requires=[],
+    extras_require={
+        'arrow': ['pyarrow'],
+    }
 )